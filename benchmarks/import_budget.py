@@ -0,0 +1,79 @@
+"""
+Cold-import budget: imports the modules needed to build productions in fresh interpreters and fails (exit code 1) if pyactr or its heavy dependencies are imported, or if the median import time exceeds the budget.
+
+Usage: python benchmarks/import_budget.py [--budget-ms 60] [--repeat 7]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = (
+    'pyactr_oo_syntax.base.chunk',
+    'pyactr_oo_syntax.base.chunk_table',
+    'pyactr_oo_syntax.base.compilation',
+    'pyactr_oo_syntax.base.decmem_loader',
+    'pyactr_oo_syntax.base.lisplike',
+    'pyactr_oo_syntax.base.model_cache',
+    'pyactr_oo_syntax.base.redundancy',
+    'pyactr_oo_syntax.base.rule_and_production',
+    'pyactr_oo_syntax.convenience.chunks',
+    'pyactr_oo_syntax.convenience.rules',
+    'pyactr_oo_syntax.helpers.data_types',
+    'pyactr_oo_syntax.helpers.enum_sequence',
+)
+
+# modules that are only allowed to be imported once something is added to a model
+FORBIDDEN = ('pyactr', 'numpy', 'simpy', 'pyparsing')
+
+# imports the modules, then builds a production and its string representation (without adding it to a model)
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+{chr(10).join(f'import {module}' for module in MODULES)}
+elapsed = time.perf_counter() - start
+from pyactr_oo_syntax.base.lisplike import e, p, q
+from pyactr_oo_syntax.convenience.chunks import SimpleGoalChunk
+str((e.GOAL_(**SimpleGoalChunk(phase='start')) & q.RETRIEVAL_(state='free') >> p.RETRIEVAL_(isa='fact', key='=K')).set_name('probe'))
+print(json.dumps({{'seconds': elapsed, 'forbidden': [module for module in {FORBIDDEN!r} if module in sys.modules]}}))
+"""
+
+
+def measure(repeat:int) -> tuple[list[float], set[str]]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (REPOSITORY, os.environ.get('PYTHONPATH')))))
+    seconds, forbidden = [], set()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', PROBE], env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        seconds.append(result['seconds'])
+        forbidden.update(result['forbidden'])
+    return seconds, forbidden
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=60, help='maximum median import time in milliseconds')
+    parser.add_argument('--repeat', type=int, default=7, help='number of fresh interpreters')
+    args = parser.parse_args()
+
+    seconds, forbidden = measure(args.repeat)
+    median_ms = statistics.median(seconds) * 1000
+    print(f"cold import: median {median_ms:.1f} ms, min {min(seconds) * 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if forbidden:
+        print(f"FAIL: imported at package import / production building: {', '.join(sorted(forbidden))}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: median import time exceeds the budget by {median_ms - args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Benchmark suite for building productions and models: construction (lisp-like and class notation), composition (&, >>, +), string conversion, adding productions to a model, and adding chunks to declarative memory, each at several sizes (number of productions / chunks).
+Records the time (best of --repeat runs) and the peak memory allocated during a run (separate run with tracemalloc), writes them as JSON, and compares them against a baseline.
+
+Usage:
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --compare benchmarks/baseline.json          # exit code 1 on regressions
+    python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/suite.py --sizes 10 1000 --only construct_lisplike compose
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+from functools import reduce
+from typing import Callable, NamedTuple
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPOSITORY)
+
+from pyactr_oo_syntax.base.chunk import AdvChunk
+from pyactr_oo_syntax.base.decmem_loader import add_chunks_to_decmem
+from pyactr_oo_syntax.base.lisplike import e, p, q, t
+from pyactr_oo_syntax.base.rule_and_production import production_sequence
+from pyactr_oo_syntax.convenience.rules import is_retrieved_, is_simple_goal_, press_key_, query_, retrieve_
+from pyactr_oo_syntax.helpers.data_types import Buffer, BufferStatus
+
+SIZES = (10, 1_000, 10_000, 100_000)
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[int], object] # builds the input for size n (not measured)
+    run: Callable[[object], object]
+    max_size: int|None = None # larger sizes are skipped (too slow to be run regularly)
+
+
+## Inputs ##
+
+def lisplike_production(i:int):
+    return (
+        e.GOAL_(isa='goal', phase=f'phase{i}') &
+        q.RETRIEVAL_(state='free')
+        >>
+        p.GOAL_(isa='goal', phase=f'phase{i + 1}') &
+        p.RETRIEVAL_(isa='fact', key=f'key{i}') &
+        t.IMAGINAL_()
+    ).set_name(f'lisplike{i}')
+
+
+def convenience_production(i:int):
+    return (
+        is_simple_goal_(phase=f'phase{i}') &
+        is_retrieved_(isa='fact', value='=V') &
+        query_(Buffer.MANUAL, status=BufferStatus.MANUAL.FREE)
+        >>
+        is_simple_goal_(phase=f'phase{i + 1}') &
+        retrieve_(isa='fact', key=f'key{i}') &
+        press_key_(key='=V')
+    ).set_name(f'convenience{i}')
+
+
+def productions(n:int) -> production_sequence:
+    return production_sequence(productions=[lisplike_production(i) for i in range(n)])
+
+
+def rule_pairs(n:int) -> list:
+    return [(e.GOAL_(isa='goal', phase=f'phase{i}'), p.GOAL_(isa='goal', phase=f'phase{i + 1}')) for i in range(n)]
+
+
+def chunks(n:int) -> list[AdvChunk]:
+    return [AdvChunk(isa='fact', key=f'key{i}', value=str(i % 100)) for i in range(n)]
+
+
+def new_model():
+    from pyactr import ACTRModel
+    return ACTRModel()
+
+
+## Benchmarks ##
+
+def compose(pairs:list):
+    # & and >> per production, + for the production sequence
+    return reduce(lambda sequence, production: sequence + production, ((lhs & q.RETRIEVAL_(state='free')) >> (rhs & t.RETRIEVAL_()) for lhs, rhs in pairs))
+
+
+def add_to_model(sequence_and_model, compiled:bool=True):
+    sequence, model = sequence_and_model
+    return sequence.add_to_model(model, compiled=compiled)
+
+
+def add_to_decmem(chunks_and_model):
+    chunk_list, model = chunks_and_model
+    for chunk in chunk_list:
+        chunk.add_to_decmem(model)
+
+
+def add_chunks_to_decmem_bulk(chunks_and_model):
+    chunk_list, model = chunks_and_model
+    return add_chunks_to_decmem(model, chunk_list)
+
+
+BENCHMARKS = (
+    Benchmark('construct_lisplike', setup=lambda n: n, run=lambda n: [lisplike_production(i) for i in range(n)]),
+    Benchmark('construct_convenience', setup=lambda n: n, run=lambda n: [convenience_production(i) for i in range(n)]),
+    Benchmark('compose', setup=rule_pairs, run=compose),
+    Benchmark('str', setup=productions, run=str),
+    Benchmark('add_to_model', setup=lambda n: (productions(n), new_model()), run=add_to_model),
+    Benchmark('add_to_model_string', setup=lambda n: (productions(n), new_model()), run=lambda state: add_to_model(state, compiled=False), max_size=1_000),
+    Benchmark('add_to_decmem', setup=lambda n: (chunks(n), new_model()), run=add_to_decmem),
+    Benchmark('add_chunks_to_decmem', setup=lambda n: (chunks(n), new_model()), run=add_chunks_to_decmem_bulk),
+)
+
+
+## Measurement ##
+
+def measure(benchmark:Benchmark, size:int, repeat:int) -> dict:
+    seconds = []
+    for _ in range(repeat):
+        state = benchmark.setup(size)
+        gc.collect()
+        start = time.perf_counter()
+        benchmark.run(state)
+        seconds.append(time.perf_counter() - start)
+        del state
+
+    state = benchmark.setup(size)
+    gc.collect()
+    tracemalloc.start()
+    benchmark.run(state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'name': benchmark.name, 'size': size, 'seconds': min(seconds), 'peak_kib': round(peak / 1024, 1)}
+
+
+def environment() -> dict:
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        pyactr_version = version('pyactr')
+    except PackageNotFoundError:
+        pyactr_version = None
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'processor': platform.processor(), 'pyactr': pyactr_version}
+
+
+def run_suite(sizes:list[int], repeat:int, only:list[str]|None=None) -> dict:
+    warnings.simplefilter('ignore') # pyactr warns whenever a chunk type is created or extended
+    results = []
+    for benchmark in BENCHMARKS:
+        if only and benchmark.name not in only:
+            continue
+        for size in sizes:
+            if benchmark.max_size is not None and size > benchmark.max_size:
+                continue
+            result = measure(benchmark, size, repeat)
+            print(f"{result['name']:<24}{size:>8}{result['seconds'] * 1000:>12.2f} ms{result['peak_kib']:>14.1f} KiB", file=sys.stderr)
+            results.append(result)
+    return {'environment': environment(), 'repeat': repeat, 'results': results}
+
+
+def compare(results:dict, baseline:dict, tolerance:float, min_seconds:float=0.001, min_kib:float=64) -> list[str]:
+    # differences below min_seconds / min_kib are ignored (noise at small sizes)
+    baseline_results = {(result['name'], result['size']): result for result in baseline['results']}
+    regressions = []
+    print(f"\n{'benchmark':<24}{'size':>8}{'time':>12}{'memory':>12}", file=sys.stderr)
+    for result in results['results']:
+        base = baseline_results.get((result['name'], result['size']))
+        if base is None:
+            continue
+        time_ratio = result['seconds'] / base['seconds'] if base['seconds'] else float('inf')
+        memory_ratio = result['peak_kib'] / base['peak_kib'] if base['peak_kib'] else float('inf')
+        print(f"{result['name']:<24}{result['size']:>8}{time_ratio:>11.2f}x{memory_ratio:>11.2f}x", file=sys.stderr)
+        if time_ratio > 1 + tolerance and result['seconds'] - base['seconds'] > min_seconds:
+            regressions.append(f"{result['name']} ({result['size']}): time {base['seconds'] * 1000:.2f} ms -> {result['seconds'] * 1000:.2f} ms")
+        if memory_ratio > 1 + tolerance and result['peak_kib'] - base['peak_kib'] > min_kib:
+            regressions.append(f"{result['name']} ({result['size']}): peak memory {base['peak_kib']:.1f} KiB -> {result['peak_kib']:.1f} KiB")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='+', choices=[benchmark.name for benchmark in BENCHMARKS], help='benchmarks to run (default: all)')
+    parser.add_argument('--output', help='file for the results as JSON (default: stdout)')
+    parser.add_argument('--save-baseline', help='file to store the results as new baseline')
+    parser.add_argument('--compare', help='baseline file to compare the results against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative increase of time and memory before it counts as regression')
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.repeat, args.only)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as file:
+                json.dump(results, file, indent=2)
+    if not args.output:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get('environment') != results['environment']:
+            # times are only comparable on the same machine and versions (the committed baseline records where it was made)
+            print(f"NOTE: baseline from another environment: {baseline.get('environment')}", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
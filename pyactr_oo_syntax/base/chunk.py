@@ -1,28 +1,147 @@
 """
-Extension of pyactr Chunk class to enable conversion to string and keyword unpacking (**).
+Chunk class that can be converted to string, used with keyword unpacking (**), and converted into a pyactr Chunk.
+It does not depend on pyactr itself, so that productions can be built without importing pyactr (which is only imported once something is added to a model); once pyactr is imported, its buffers and declarative memory accept AdvChunks (converted with `to_pyactr`).
 """
 
-from pyactr import ACTRModel, chunkstring
-from pyactr.chunks import Chunk
+from __future__ import annotations
+import sys
+from typing import TYPE_CHECKING, Iterable, Iterator
+from weakref import WeakValueDictionary
+
+from pyactr_oo_syntax.base.compilation import build_chunk, compile_chunk
+
+if TYPE_CHECKING:
+    from pyactr import ACTRModel
+    from pyactr.chunks import Chunk
+
+_interned_chunks:WeakValueDictionary[tuple, AdvChunk] = WeakValueDictionary()
+
+class AdvChunk():
+    # chunks are immutable; like in pyactr, slots are ordered alphabetically and empty (None) slots are left out
+    __slots__ = ('__isa', '__slots', '__str_items', '__weakref__')
 
-class AdvChunk(Chunk):
     def __init__(self, isa:str, **kwargs):
-        super().__init__(typename=isa, **kwargs)
+        self.__isa:str = isa
+        self.__slots:dict[str, object] = {key: kwargs[key] for key in sorted(kwargs) if kwargs[key] is not None}
+        self.__str_items:tuple[tuple[str, str], ...]|None = None
 
     def __str__(self):
-        values = '\n'.join([' '.join((key, str(item))) for key, item in self._asdict().items() if item != None])
-        string_representation = f"""isa {self.typename}{'\n'+values if values else ''}"""
-        return string_representation
-    
+        return '\n'.join(' '.join(item) for item in self.str_items())
+
+    def __repr__(self):
+        return f"{self.__isa}({', '.join(f'{key}= {value}' for key, value in self.str_items()[1:])})"
+
+    def __eq__(self, other:object) -> bool:
+        if isinstance(other, AdvChunk):
+            return self is other or self.str_items() == other.str_items()
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        self.str_items()
+        return hash(self.__str_items)
+
+    @property
+    def typename(self) -> str:
+        return self.__isa
+
+    def _asdict(self) -> dict[str, object]:
+        return dict(self.__slots)
+
+    def str_items(self) -> list[tuple[str, str]]:
+        # slot values never change after __init__, so the formatted slots are cached
+        if self.__str_items is None:
+            self.__str_items = tuple(self._iter_str_items())
+        return list(self.__str_items)
+
+    def _iter_str_items(self) -> Iterator[tuple[str, str]]:
+        # the formatted slots without caching them (for streaming, see `rule_._text`)
+        if self.__str_items is not None:
+            yield from self.__str_items
+            return
+        yield ('isa', str(self.__isa))
+        for key, item in self.__slots.items():
+            yield key, str(item)
+
+    def interned(self) -> AdvChunk:
+        self.str_items()
+        return _interned_chunks.setdefault(self.__str_items, self)
+
     def __getitem__(self, key:str):
-        return self.typename if key == 'isa' else (self._asdict().get(key, ''))
+        return self.__isa if key == 'isa' else (self.__slots.get(key, ''))
 
     def keys(self) -> list[str]:
         keys = ['isa']
-        keys.extend(self._asdict().keys())
+        keys.extend(self.__slots.keys())
         return keys
-    
-    def add_to_decmem(self, model:ACTRModel, time:int=0):
-        cstring = chunkstring(string=str(self))
+
+    def to_pyactr(self) -> Chunk:
+        return build_chunk(compile_chunk(self.str_items()))
+
+    def add_to_decmem(self, model:ACTRModel, time:int=0, compiled:bool=True, indexed:bool=False):
+        # compiled: the pyactr chunk is built directly; otherwise pyactr parses the string representation (both result in the same chunk)
+        # indexed: see `add_chunks_to_decmem`
+        if indexed:
+            from pyactr_oo_syntax.runtime.decmem_index import install_decmem_index
+            install_decmem_index(model)
+        if compiled:
+            cstring = self.to_pyactr()
+        else:
+            from pyactr import chunkstring
+            cstring = chunkstring(string=str(self))
         model.decmem.add(element=cstring, time=time)
         return cstring
+
+
+## Compatibility with pyactr ##
+
+# pyactr only accepts its own chunks in buffers (goal, retrieval, ...) and declarative memory; their add methods are wrapped to convert AdvChunks with `to_pyactr`
+# the wrapping happens once pyactr is imported (by any module, before or after this one), so importing this module does not import pyactr
+
+def _converted(element:object) -> object:
+    from pyactr.chunks import Chunk
+    if isinstance(element, AdvChunk):
+        return element.to_pyactr()
+    if isinstance(element, (Chunk, str)) or not isinstance(element, Iterable):
+        return element
+    return [item.to_pyactr() if isinstance(item, AdvChunk) else item for item in element] # iterable of chunks (declarative memory)
+
+
+def _accept_adv_chunks():
+    from pyactr.buffers import Buffer
+    from pyactr.declarative import DecMem
+    if getattr(Buffer.add, 'accepts_adv_chunks', False):
+        return
+    buffer_add, decmem_add = Buffer.add, DecMem.add
+    def add_to_buffer(self, elem):
+        return buffer_add(self, elem.to_pyactr() if isinstance(elem, AdvChunk) else elem)
+    def add_to_decmem(self, element, time=0):
+        return decmem_add(self, _converted(element), time)
+    for add, wrapped in ((add_to_buffer, buffer_add), (add_to_decmem, decmem_add)):
+        add.__name__, add.__qualname__, add.__doc__ = wrapped.__name__, wrapped.__qualname__, wrapped.__doc__
+        add.accepts_adv_chunks = True
+    Buffer.add, DecMem.add = add_to_buffer, add_to_decmem
+
+
+class _AcceptAdvChunksOnImport:
+    # meta path finder that wraps pyactr right after it was imported (pyactr's package imports all of its modules)
+    @staticmethod
+    def find_spec(fullname:str, path=None, target=None):
+        if fullname != 'pyactr':
+            return None
+        import importlib.util
+        sys.meta_path.remove(_AcceptAdvChunksOnImport)
+        spec = importlib.util.find_spec(fullname)
+        if spec is None or spec.loader is None:
+            return spec
+        exec_module = spec.loader.exec_module
+        def exec_and_accept(module):
+            exec_module(module)
+            _accept_adv_chunks()
+        spec.loader.exec_module = exec_and_accept
+        return spec
+
+
+if 'pyactr' in sys.modules:
+    _accept_adv_chunks()
+elif _AcceptAdvChunksOnImport not in sys.meta_path:
+    sys.meta_path.insert(0, _AcceptAdvChunksOnImport)
@@ -0,0 +1,235 @@
+"""
+Columnar storage of many chunks of the same type: one array of symbol IDs per slot (values are interned in a `SymbolTable`) and a shared `isa`, instead of one `AdvChunk` object with its own dictionary and strings per chunk.
+Rows are converted into `AdvChunk`s (or pyactr chunks) only when they are accessed, and tables can be loaded into declarative memory directly.
+"""
+
+from __future__ import annotations
+from array import array
+from typing import TYPE_CHECKING, Iterable, Iterator, Mapping
+
+from pyactr_oo_syntax.base.chunk import AdvChunk
+from pyactr_oo_syntax.base.compilation import CompiledChunk, SlotValue, build_chunk, compile_value
+
+if TYPE_CHECKING:
+    from pyactr import ACTRModel
+    from pyactr.chunks import Chunk
+
+EMPTY = 0 # symbol ID of empty slots
+
+
+class SymbolTable:
+    # interned slot values (their string form, as in `AdvChunk.str_items`); can be shared by several tables
+    def __init__(self):
+        self.__symbols:list[str|None] = [None]
+        self.__ids:dict[str, int] = {}
+        self.__compiled:list[SlotValue|None] = [None]
+
+    def id_of(self, value:object) -> int:
+        if value is None:
+            return EMPTY
+        symbol = str(value)
+        symbol_id = self.__ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.__ids[symbol] = len(self.__symbols)
+            self.__symbols.append(symbol)
+            self.__compiled.append(None)
+        return symbol_id
+
+    def symbol(self, symbol_id:int) -> str|None:
+        return self.__symbols[symbol_id]
+
+    def compiled(self, symbol_id:int) -> SlotValue:
+        # every symbol is compiled once, no matter how many chunks use it
+        compiled = self.__compiled[symbol_id]
+        if compiled is None:
+            compiled = self.__compiled[symbol_id] = compile_value(self.__symbols[symbol_id])
+        return compiled
+
+    def __len__(self) -> int:
+        return len(self.__symbols) - 1
+
+    def __contains__(self, value:object) -> bool:
+        return str(value) in self.__ids
+
+
+class ChunkRow:
+    # view of one row of a table; like `AdvChunk`, it supports `keys()`, `row[slot]` (empty slots: ''), and keyword unpacking (`**row`)
+    __slots__ = ('__table', '__index')
+
+    def __init__(self, table:ChunkTable, index:int):
+        self.__table = table
+        self.__index = index
+
+    @property
+    def typename(self) -> str:
+        return self.__table.isa
+
+    @property
+    def index(self) -> int:
+        return self.__index
+
+    def keys(self) -> list[str]:
+        keys = ['isa']
+        keys.extend(slot for slot, symbol_id in self.__table._row_ids(self.__index) if symbol_id != EMPTY)
+        return keys
+
+    def __getitem__(self, key:str) -> str:
+        if key == 'isa':
+            return self.__table.isa
+        symbol_id = self.__table._id_at(key, self.__index)
+        return '' if symbol_id == EMPTY else self.__table.symbols.symbol(symbol_id)
+
+    def str_items(self) -> list[tuple[str, str]]:
+        symbols = self.__table.symbols
+        items = [('isa', self.__table.isa)]
+        items.extend((slot, symbols.symbol(symbol_id)) for slot, symbol_id in self.__table._row_ids(self.__index) if symbol_id != EMPTY)
+        return items
+
+    def compile(self) -> CompiledChunk:
+        symbols = self.__table.symbols
+        return CompiledChunk(
+            isa=self.__table.compiled_isa,
+            slots=tuple((slot, symbols.compiled(symbol_id)) for slot, symbol_id in self.__table._row_ids(self.__index) if symbol_id != EMPTY)
+        )
+
+    def to_advchunk(self) -> AdvChunk:
+        return AdvChunk(**dict(self.str_items()))
+
+    def to_pyactr(self) -> Chunk:
+        return build_chunk(self.compile())
+
+    def __eq__(self, other:object) -> bool:
+        if isinstance(other, (ChunkRow, AdvChunk)):
+            return self.str_items() == other.str_items()
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        # the same as for an equal `AdvChunk`
+        return hash(tuple(self.str_items()))
+
+    def __str__(self):
+        return '\n'.join(' '.join(item) for item in self.str_items())
+
+    def __repr__(self):
+        return f"{self.typename}({', '.join(f'{key}= {value}' for key, value in self.str_items()[1:])})"
+
+
+class ChunkTable:
+    # chunks of one type; slots are kept in alphabetical order (as in `AdvChunk`), slots that are added later are empty for the previous rows
+    def __init__(self, isa:str, slots:Iterable[str]=(), symbols:SymbolTable|None=None):
+        self.isa = isa
+        self.compiled_isa = compile_value(isa)
+        self.symbols = symbols if symbols is not None else SymbolTable()
+        self.__columns:dict[str, array] = {}
+        self.__length = 0
+        for slot in slots:
+            self.add_slot(slot)
+
+    @classmethod
+    def from_chunks(cls, chunks:Iterable[AdvChunk|Mapping[str, object]], isa:str|None=None, symbols:SymbolTable|None=None) -> ChunkTable:
+        # chunks (e.g., a generator) are consumed one by one, so they never have to exist at the same time; all of them must have the type of the first one (or isa)
+        table = None if isa is None else cls(isa, symbols=symbols)
+        for chunk in chunks:
+            if table is None:
+                table = cls(str(chunk['isa']), symbols=symbols)
+            table.append(chunk)
+        if table is None:
+            raise ValueError("The type of an empty table has to be given (isa).")
+        return table
+
+    @classmethod
+    def from_columns(cls, isa:str, columns:Mapping[str, Iterable[object]], symbols:SymbolTable|None=None) -> ChunkTable:
+        # columns of equal length; None are empty slots
+        table = cls(isa, slots=columns, symbols=symbols)
+        lengths = set()
+        for slot, values in columns.items():
+            column = table.__columns[slot]
+            column.extend(table.symbols.id_of(value) for value in values)
+            lengths.add(len(column))
+        if len(lengths) > 1:
+            raise ValueError(f"All columns must have the same length, not {sorted(lengths)}.")
+        table.__length = lengths.pop() if lengths else 0
+        return table
+
+    @property
+    def slots(self) -> list[str]:
+        return list(self.__columns)
+
+    def add_slot(self, slot:str):
+        if slot == 'isa':
+            raise ValueError("'isa' is shared by all chunks of a table.")
+        if slot not in self.__columns:
+            self.__columns[slot] = array('I', [EMPTY]) * self.__length
+            self.__columns = dict(sorted(self.__columns.items()))
+
+    def append(self, chunk:AdvChunk|ChunkRow|Mapping[str, object]) -> ChunkTable:
+        typename = chunk['isa']
+        if str(typename) != self.isa:
+            raise ValueError(f"The chunk {chunk!r} is of type '{typename}', not '{self.isa}'.")
+        values = {key: chunk[key] for key in chunk.keys() if key != 'isa'}
+        for slot in values:
+            if slot not in self.__columns:
+                self.add_slot(slot)
+        id_of = self.symbols.id_of
+        for slot, column in self.__columns.items():
+            value = values.get(slot)
+            column.append(EMPTY if value is None or value == '' else id_of(value))
+        self.__length += 1
+        return self
+
+    def extend(self, chunks:Iterable[AdvChunk|ChunkRow|Mapping[str, object]]) -> ChunkTable:
+        for chunk in chunks:
+            self.append(chunk)
+        return self
+
+    def _id_at(self, slot:str, index:int) -> int:
+        column = self.__columns.get(slot)
+        return EMPTY if column is None else column[index]
+
+    def _row_ids(self, index:int) -> Iterator[tuple[str, int]]:
+        for slot, column in self.__columns.items():
+            yield slot, column[index]
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __getitem__(self, index:int) -> ChunkRow:
+        if index < 0:
+            index += self.__length
+        if not 0 <= index < self.__length:
+            raise IndexError("ChunkTable index out of range")
+        return ChunkRow(self, index)
+
+    def __iter__(self) -> Iterator[ChunkRow]:
+        return (ChunkRow(self, index) for index in range(self.__length))
+
+    def column(self, slot:str) -> list[str|None]:
+        symbol = self.symbols.symbol
+        return [symbol(symbol_id) for symbol_id in self.__columns[slot]]
+
+    def ids(self, slot:str) -> array:
+        # the symbol IDs of a slot (e.g., for `numpy.frombuffer(table.ids(slot), dtype=numpy.uint32)`)
+        return self.__columns[slot]
+
+    def to_advchunks(self) -> Iterator[AdvChunk]:
+        return (row.to_advchunk() for row in self)
+
+    def compiled_chunks(self) -> Iterator[CompiledChunk]:
+        return (row.compile() for row in self)
+
+    def nbytes(self) -> int:
+        # memory of the columns (the symbols are counted once in the symbol table)
+        return sum(column.itemsize * len(column) for column in self.__columns.values())
+
+    def add_to_decmem(self, model:ACTRModel, time:float|Iterable[float]=0, batch_size:int=10_000, indexed:bool=False) -> int:
+        # time: shared timestamp of all chunks, or one per row; see `add_compiled_chunks_to_decmem` for batch_size and indexed
+        from pyactr_oo_syntax.base.decmem_loader import add_compiled_chunks_to_decmem
+        if isinstance(time, (int, float)):
+            time = round(float(time), 4)
+            presentations = ((compiled, time) for compiled in self.compiled_chunks())
+        else:
+            presentations = ((compiled, round(float(row_time), 4)) for compiled, row_time in zip(self.compiled_chunks(), time))
+        return add_compiled_chunks_to_decmem(model, presentations, batch_size=batch_size, indexed=indexed)
+
+    def __repr__(self) -> str:
+        return f"ChunkTable(isa={self.isa!r}, slots={self.slots}, rows={self.__length})"
@@ -0,0 +1,153 @@
+"""
+Direct compilation of rules and productions into the structures pyactr uses internally (skipping the format-then-parse round-trip of `model.productionstring`).
+pyactr is only imported when rules are compiled or pyactr structures are built.
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable, NamedTuple
+from weakref import WeakKeyDictionary
+
+from pyactr_oo_syntax.helpers.data_types import RuleType
+
+if TYPE_CHECKING:
+    from pyactr import ACTRModel, utilities
+    from pyactr.chunks import Chunk
+
+
+## Compiled Structures (plain, picklable data) ##
+
+class SlotValue(NamedTuple):
+    values: object = None
+    variables: str|None = None
+    negvalues: tuple = ()
+    negvariables: tuple = ()
+    lookup: bool = False # plain values are looked up among the named chunks of pyactr when the chunk is built (as the string parser does)
+
+
+class CompiledChunk(NamedTuple):
+    isa: SlotValue|None
+    slots: tuple[tuple[str, SlotValue], ...]
+
+
+class CompiledRule(NamedTuple):
+    key: str # rule type + buffer name, e.g. '=g' or '+manual'
+    content: CompiledChunk|tuple[tuple[str, str], ...]|None # tuple of pairs for queries and extra tests
+
+
+class CompiledProduction(NamedTuple):
+    name: str
+    lhs: tuple[CompiledRule, ...]
+    rhs: tuple[CompiledRule, ...]
+    utility: int = 0
+    reward: float|None = None
+
+
+## Compilation ##
+
+# longest symbols first, mirroring pyparsing's one_of in pyactr's chunk reader (with pyactr's ACTRVARIABLE '=', ACTRNEG '~', VISIONGREATER '>', VISIONSMALLER '<')
+_SPECIAL_SYMBOLS = ('~=', '>=', '<=', '=', '~', '>', '<')
+_VARIABLE = '='
+_VISION_SYMBOLS = ('>', '<')
+_SYMBOL_FIELDS = {'=': 'variables', '~': 'negvalues', '~=': 'negvariables'}
+_QUOTES = ('"', "'")
+
+
+def compile_value(token:str) -> SlotValue:
+    for symbol in _SPECIAL_SYMBOLS:
+        if token.startswith(symbol) and len(token) > len(symbol):
+            value = token[len(symbol):]
+            if symbol[0] in _VISION_SYMBOLS:
+                if symbol[-1] == _VARIABLE:
+                    return SlotValue(values=symbol[0], variables=value)
+                return SlotValue(values=token)
+            if value[0] in _QUOTES:
+                value = value[1:-1]
+            field = _SYMBOL_FIELDS[symbol]
+            return SlotValue(**{field: (value,) if field.startswith('neg') else value})
+    if token[:1] in _QUOTES:
+        return SlotValue(values=token[1:-1])
+    return SlotValue(values=token, lookup=True)
+
+
+def compile_chunk(slots:list[tuple[str, str]]) -> CompiledChunk:
+    isa = None
+    compiled_slots = {}
+    for slot, token in slots:
+        if slot == 'isa':
+            isa = compile_value(token)
+        else:
+            compiled_slots[slot] = compile_value(token)
+    return CompiledChunk(isa=isa, slots=tuple(compiled_slots.items()))
+
+
+def compile_rule(rule_type:RuleType, buffer_name:str, content:list[tuple[str, str]], lhs:bool) -> CompiledRule:
+    from pyactr import utilities
+    key = rule_type.value + buffer_name
+    conventions = utilities._LHSCONVENTIONS if lhs else utilities._RHSCONVENTIONS
+    if rule_type.value not in conventions:
+        raise utilities.ACTRError("The rule '%s' cannot be used on the %s side of a production; the following rule types are possible: %s" % (key, 'left' if lhs else 'right', list(conventions.keys())))
+
+    convention = conventions[rule_type.value]
+    if convention in ('query', 'extra_test'):
+        return CompiledRule(key=key, content=tuple(content))
+    elif convention == 'clear':
+        return CompiledRule(key=key, content=None)
+    else:
+        return CompiledRule(key=key, content=compile_chunk(content))
+
+
+## Building pyactr Structures ##
+
+def build_value(value:SlotValue) -> utilities.VarvalClass:
+    from pyactr.chunks import Chunk
+    from pyactr.utilities import VarvalClass
+    return _build_value(value, Chunk._chunks, VarvalClass)
+
+
+def _build_value(value:SlotValue, named_chunks:dict, varval_class:type) -> utilities.VarvalClass:
+    values = named_chunks.get(value.values, value.values) if value.lookup else value.values
+    return varval_class(values=values, variables=value.variables, negvalues=value.negvalues, negvariables=value.negvariables)
+
+
+def build_chunk(compiled:CompiledChunk, name:str='') -> Chunk:
+    # pyactr is imported once per chunk instead of once per slot (chunks are built whenever a production is tested)
+    from pyactr.chunks import Chunk, makechunk
+    from pyactr.utilities import VarvalClass
+    typename = _build_value(compiled.isa, Chunk._chunks, VarvalClass).values if compiled.isa else ''
+    return makechunk(name, typename, **{slot: _build_value(value, Chunk._chunks, VarvalClass) for slot, value in compiled.slots})
+
+
+def build_content(compiled:CompiledChunk|tuple|None):
+    if compiled is None:
+        return None
+    elif isinstance(compiled, CompiledChunk):
+        return build_chunk(compiled)
+    else:
+        return dict(compiled)
+
+
+def production_function(compiled:CompiledProduction) -> Callable:
+    # like the rules created by `model.productionstring`, chunks are built anew whenever the production is tested or fired
+    def func():
+        yield {rule.key: build_content(rule.content) for rule in compiled.lhs}
+        yield {rule.key: build_content(rule.content) for rule in compiled.rhs}
+    return func
+
+
+## Registry of Compiled Productions ##
+
+# compiled form of the productions added to each model (e.g., for indexing them); entries are only valid as long as the model still uses the same rule function
+_compiled_productions:WeakKeyDictionary[ACTRModel, dict[str, tuple[CompiledProduction, Callable]]] = WeakKeyDictionary()
+
+def add_compiled_production(model:ACTRModel, compiled:CompiledProduction, rule:Callable|None=None):
+    # rule: production function of compiled (production functions are stateless, so models built from the same compiled productions can share them)
+    rule = rule or production_function(compiled)
+    model.productions.update({compiled.name: {'rule': rule, 'utility': compiled.utility, 'reward': compiled.reward}})
+    _compiled_productions.setdefault(model, {})[compiled.name] = (compiled, rule)
+    return model.productions[compiled.name]
+
+
+def get_compiled_productions(model:ACTRModel) -> dict[str, CompiledProduction]:
+    # productions that were replaced or added otherwise (e.g., via `model.productionstring`) are left out
+    registered = _compiled_productions.get(model, {})
+    return {name: compiled for name, (compiled, rule) in registered.items() if name in model.productions and model.productions[name]['rule'] is rule}
@@ -0,0 +1,96 @@
+"""
+Bulk and streaming loading of chunks (AdvChunks, dictionaries, CSV or JSONL rows) into declarative memory without the string round-trip.
+"""
+
+from __future__ import annotations
+import csv
+import json
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, Mapping
+
+from pyactr_oo_syntax.base.chunk import AdvChunk
+from pyactr_oo_syntax.base.compilation import CompiledChunk, build_chunk, compile_chunk
+
+if TYPE_CHECKING:
+    from pyactr import ACTRModel
+    from pyactr.chunks import Chunk
+
+
+ChunkSource = AdvChunk|Mapping[str, object]
+
+
+## Conversion ##
+
+def compile_chunk_source(source:ChunkSource) -> CompiledChunk:
+    if isinstance(source, AdvChunk):
+        return compile_chunk(source.str_items())
+    return compile_chunk([(str(key), str(value)) for key, value in source.items() if value is not None])
+
+
+def to_pyactr_chunk(source:ChunkSource) -> Chunk:
+    return build_chunk(compile_chunk_source(source))
+
+
+def chunk_presentations(chunks:Iterable[ChunkSource|tuple[ChunkSource, float]], time:float|None=0, time_key:str='time') -> Iterator[tuple[ChunkSource, float]]:
+    # time: shared timestamp of all chunks; with time=None, each row brings its own, either as (chunk, time) pair or (for dictionaries) under time_key
+    for row in chunks:
+        row_time = time
+        if isinstance(row, tuple):
+            row, row_time = row
+        elif time is None and not isinstance(row, AdvChunk):
+            row = dict(row)
+            row_time = row.pop(time_key)
+        yield row, round(float(row_time), 4)
+
+
+## Loading ##
+
+def add_compiled_chunks_to_decmem(model:ACTRModel, presentations:Iterable[tuple[CompiledChunk, float]], batch_size:int=10_000, indexed:bool=False) -> int:
+    # presentations are consumed in batches of batch_size, so generators of arbitrary length are loaded with bounded memory
+    # indexed: declarative memory keeps an index of slot values, so retrievals with constant values only test matching chunks (see `runtime/decmem_index.py`)
+    import numpy as np
+    if indexed:
+        from pyactr_oo_syntax.runtime.decmem_index import install_decmem_index
+        install_decmem_index(model)
+    decmem = model.decmem
+    iterator = iter(presentations)
+    count = 0
+    while batch := list(islice(iterator, batch_size)):
+        times_per_chunk:dict[Chunk, list[float]] = {}
+        for compiled, time in batch:
+            times_per_chunk.setdefault(build_chunk(compiled), []).append(time)
+
+        for chunk, times in times_per_chunk.items():
+            new_times = np.array(times)
+            if chunk in decmem:
+                new_times = np.concatenate((decmem[chunk], new_times))
+            decmem[chunk] = new_times
+        count += len(batch)
+    return count
+
+
+def add_chunks_to_decmem(model:ACTRModel, chunks:Iterable[ChunkSource|tuple[ChunkSource, float]], time:float|None=0, time_key:str='time', batch_size:int=10_000, indexed:bool=False) -> int:
+    presentations = ((compile_chunk_source(chunk), chunk_time) for chunk, chunk_time in chunk_presentations(chunks, time, time_key))
+    return add_compiled_chunks_to_decmem(model, presentations, batch_size=batch_size, indexed=indexed)
+
+
+## Streaming Readers ##
+
+def read_csv_chunks(path:str, isa:str|None=None, **reader_kwargs) -> Iterator[dict[str, str]]:
+    # empty cells are treated as empty slots; without an `isa` column, `isa` has to be given
+    with open(path, newline='') as file:
+        for row in csv.DictReader(file, **reader_kwargs):
+            chunk = {key: value for key, value in row.items() if value not in (None, '')}
+            if isa is not None:
+                chunk.setdefault('isa', isa)
+            yield chunk
+
+
+def read_jsonl_chunks(path:str, isa:str|None=None) -> Iterator[dict[str, object]]:
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                chunk = json.loads(line)
+                if isa is not None:
+                    chunk.setdefault('isa', isa)
+                yield chunk
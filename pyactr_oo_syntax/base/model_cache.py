@@ -0,0 +1,121 @@
+"""
+On-disk cache of compiled production sequences and declarative memory chunks, keyed by a content hash of the objects (any change of a rule, name, utility, reward, or chunk results in a new key).
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import TYPE_CHECKING, Callable, Iterable, NamedTuple
+
+from pyactr_oo_syntax.base.compilation import CompiledChunk, CompiledProduction, add_compiled_production
+from pyactr_oo_syntax.base.decmem_loader import ChunkSource, add_compiled_chunks_to_decmem, chunk_presentations, compile_chunk_source
+from pyactr_oo_syntax.base.rule_and_production import production_sequence
+
+if TYPE_CHECKING:
+    from pyactr import ACTRModel
+
+CACHE_FORMAT_VERSION = 1
+
+
+class CompiledModel(NamedTuple):
+    productions: tuple[CompiledProduction, ...]
+    chunks: tuple[tuple[CompiledChunk, float], ...] # (chunk, time of presentation)
+
+
+class ModelCache:
+    def __init__(self, directory:str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, productions:production_sequence, chunks:Iterable[tuple[ChunkSource, float]]=()) -> str:
+        content_hash = hashlib.sha256(repr(CACHE_FORMAT_VERSION).encode())
+        for prod in productions:
+            content_hash.update(repr((
+                prod.get_name(),
+                prod.get_utility(),
+                prod.get_reward(),
+                tuple(rule.get_key() for rule in prod.get_lhs()),
+                tuple(rule.get_key() for rule in prod.get_rhs())
+            )).encode())
+        for chunk, time in chunks:
+            content_hash.update(repr((tuple(compile_chunk_source(chunk)), time)).encode())
+        return content_hash.hexdigest()
+
+    def path(self, key:str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key:str) -> CompiledModel|None:
+        # a file that cannot be loaded (corrupted, or written by a version whose classes were renamed or moved) is a miss and is deleted, so that it is rebuilt
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                compiled = pickle.load(file)
+            if not isinstance(compiled, CompiledModel):
+                raise TypeError(f"{path} does not contain a compiled model")
+            return compiled
+        except FileNotFoundError:
+            return None
+        except Exception:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, key:str, compiled:CompiledModel):
+        # written to a temporary file first, so concurrently starting workers never read a partially written cache file (the temporary file is removed if writing fails)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                pickle.dump(compiled, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path(key))
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def source_key(self, source:str) -> str:
+        # key for a model that is built from a source that the caller identifies (e.g., a hash of the files the productions are generated from, and their version)
+        return hashlib.sha256(repr((CACHE_FORMAT_VERSION, 'source', source)).encode()).hexdigest()
+
+    def __compile(self, productions:production_sequence, presentations:list[tuple[ChunkSource, float]]) -> CompiledModel:
+        # the productions are not changed: unnamed productions are only named in their compiled form (by position), so that they result in the same key next time
+        return CompiledModel(
+            productions=tuple(compiled if compiled.name else compiled._replace(name=f"unnamedrule{index}") for index, compiled in enumerate(prod.compile() for prod in productions)),
+            chunks=tuple((compile_chunk_source(chunk), chunk_time) for chunk, chunk_time in presentations)
+        )
+
+    def __load(self, model:ACTRModel, compiled:CompiledModel):
+        for compiled_prod in compiled.productions:
+            add_compiled_production(model, compiled_prod)
+        add_compiled_chunks_to_decmem(model, compiled.chunks)
+
+    def add_to_model(self, model:ACTRModel, productions:production_sequence, chunks:Iterable[ChunkSource|tuple[ChunkSource, float]]=(), time:float|None=0, time_key:str='time') -> bool:
+        # adds productions and chunks (see `add_chunks_to_decmem` for time and time_key) to the model, from the cache if possible; returns whether the cache was hit
+        presentations = list(chunk_presentations(chunks, time, time_key))
+        key = self.key(productions, presentations)
+        compiled = self.get(key)
+        hit = compiled is not None
+        if not hit:
+            compiled = self.__compile(productions, presentations)
+            self.put(key, compiled)
+        self.__load(model, compiled)
+        return hit
+
+    def add_built_to_model(self, model:ACTRModel, source:str, build:Callable[[], production_sequence|tuple[production_sequence, Iterable[ChunkSource|tuple[ChunkSource, float]]]], time:float|None=0, time_key:str='time') -> bool:
+        # like `add_to_model`, but keyed by source (see `source_key`) instead of the content: on a hit, nothing is built; build is only called on a miss and returns the productions (and chunks)
+        # the caller is responsible for changing source whenever the result of build changes
+        key = self.source_key(source)
+        compiled = self.get(key)
+        hit = compiled is not None
+        if not hit:
+            built = build()
+            productions, chunks = built if isinstance(built, tuple) else (built, ())
+            compiled = self.__compile(productions, list(chunk_presentations(chunks, time, time_key)))
+            self.put(key, compiled)
+        self.__load(model, compiled)
+        return hit
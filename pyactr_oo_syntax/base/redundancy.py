@@ -0,0 +1,245 @@
+"""
+Pass over a `production_sequence` that finds productions that only add matching cost: exact duplicates (after normalizing the order of rules), productions subsumed by a more general one with the same actions, and productions that can never match because a buffer value they test is never set.
+The findings are reported and can be pruned before `add_to_model`; kept productions keep their names, utilities, and rewards.
+"""
+
+from __future__ import annotations
+from enum import Enum
+from typing import Iterable, Mapping, NamedTuple
+
+from pyactr_oo_syntax.base.chunk import AdvChunk
+from pyactr_oo_syntax.base.rule_and_production import production, production_sequence, rule_, rule_sequence_
+from pyactr_oo_syntax.helpers.data_types import Buffer, RuleType
+
+_QUOTES = ('"', "'")
+_SPECIAL_PREFIXES = ('=', '~', '>', '<')
+_ANY = None # all values of a slot are possible
+
+
+## Normalization ##
+
+def _rules_by_key(rules:rule_sequence_) -> dict[str, rule_]:
+    # like pyactr's dict of rules: a later rule for the same buffer (and type) replaces an earlier one at the position of the first
+    by_key = {}
+    for rule in rules:
+        by_key[rule.get_rule_type().value + rule.get_buffer_name()] = rule
+    return by_key
+
+
+def _is_order_sensitive(rules:Iterable[rule_]) -> bool:
+    # `~=x` compares with a variable that has to be bound by an earlier test, so the order of these rules matters
+    return any(value.startswith('~=') for rule in rules for _, value in rule.get_content())
+
+
+def _rule_signature(rule:rule_) -> tuple:
+    content = rule.get_content()
+    if rule.get_rule_type() == RuleType.QUERY:
+        content = sorted(dict(content).items())
+    return (rule.get_rule_type().value, rule.get_buffer_name(), tuple(content))
+
+
+def normalized_lhs(prod:production) -> list[rule_]:
+    # rules of the LHS in a canonical order (by rule type and buffer), unless the order matters (see `_is_order_sensitive`)
+    rules = list(_rules_by_key(prod.get_lhs()).values())
+    if _is_order_sensitive(rules):
+        return rules
+    return sorted(rules, key=_rule_signature)
+
+
+def normalized(prod:production) -> production:
+    # same name, utility, and reward; the RHS keeps its order (actions are carried out in this order), only replaced rules are dropped
+    normalized_prod = production(lhs=rule_sequence_(normalized_lhs(prod)), rhs=rule_sequence_(_rules_by_key(prod.get_rhs()).values()))
+    normalized_prod.set_name(prod.get_name())
+    normalized_prod.set_utility(prod.get_utility())
+    normalized_prod.set_reward(prod.get_reward())
+    return normalized_prod
+
+
+def signature(prod:production) -> tuple[tuple, tuple]:
+    # equal for productions that pyactr treats the same (apart from name, utility, and reward)
+    return (tuple(map(_rule_signature, normalized_lhs(prod))), tuple(map(_rule_signature, _rules_by_key(prod.get_rhs()).values())))
+
+
+## Findings ##
+
+class RedundancyKind(Enum):
+    DUPLICATE = 'duplicate'
+    SUBSUMED = 'subsumed'
+    UNREACHABLE = 'unreachable'
+
+
+class Redundancy(NamedTuple):
+    kind: RedundancyKind
+    production: production
+    cause: production|None # the kept duplicate or the more general production (None for unreachable productions)
+    detail: str
+
+
+class RedundancyReport:
+    def __init__(self, productions:production_sequence, findings:list[Redundancy]):
+        self.productions = productions
+        self.findings = findings
+
+    def of_kind(self, kind:RedundancyKind) -> list[Redundancy]:
+        return [finding for finding in self.findings if finding.kind == kind]
+
+    def pruned(self, normalize:bool=True) -> production_sequence:
+        # the sequence without the findings (in the original order); normalize: LHS rules of the kept productions in canonical order
+        redundant = {id(finding.production) for finding in self.findings}
+        kept = (prod for prod in self.productions if id(prod) not in redundant)
+        return production_sequence([normalized(prod) for prod in kept] if normalize else list(kept))
+
+    def __len__(self) -> int:
+        return len(self.findings)
+
+    def __str__(self) -> str:
+        lines = [f"{len(self.findings)} of {len(self.productions)} productions are redundant"]
+        for finding in self.findings:
+            cause = f" ({finding.cause.get_name() or 'unnamed'})" if finding.cause is not None else ''
+            lines.append(f"  {finding.kind.value:<12}{finding.production.get_name() or 'unnamed'}{cause}: {finding.detail}")
+        return '\n'.join(lines)
+
+    def __repr__(self) -> str:
+        counts = ', '.join(f"{kind.value}={len(self.of_kind(kind))}" for kind in RedundancyKind)
+        return f"RedundancyReport(productions={len(self.productions)}, {counts})"
+
+
+## Analysis ##
+
+def _plain(value:str) -> str:
+    return value[1:-1] if value[:1] in _QUOTES and len(value) > 1 else value
+
+
+def _is_constant(value:str) -> bool:
+    return not value.startswith(_SPECIAL_PREFIXES) and value != 'None'
+
+
+def _constant_tests(prod:production, buffers:set[str]) -> list[tuple[str, str, str]]:
+    # (buffer, slot, value) of the constant slot tests on the analyzed buffers (the type is ignored, like in pyactr's matching)
+    tests = []
+    for rule in _rules_by_key(prod.get_lhs()).values():
+        if rule.get_rule_type() == RuleType.SUBSUMPTION and rule.get_buffer_name() in buffers:
+            tests.extend((rule.get_buffer_name(), slot, _plain(value)) for slot, value in rule.get_content() if slot != 'isa' and _is_constant(value))
+    return tests
+
+
+def _set_values(prod:production, buffers:set[str]) -> list[tuple[str, str, str|None]]:
+    # (buffer, slot, value) written by the RHS into the analyzed buffers; variables can be any value
+    values = []
+    for rule in _rules_by_key(prod.get_rhs()).values():
+        if rule.get_rule_type() in (RuleType.SUBSUMPTION, RuleType.REQUEST) and rule.get_buffer_name() in buffers:
+            values.extend((rule.get_buffer_name(), slot, _plain(value) if _is_constant(value) else _ANY) for slot, value in rule.get_content() if slot != 'isa')
+    return values
+
+
+def _unreachable(productions:list[production], initial:Mapping[str, Iterable[AdvChunk|Mapping[str, object]]]) -> dict[int, str]:
+    # productions whose constant tests on the analyzed buffers (the keys of initial, whose contents only change by productions) can never be satisfied, by index
+    buffers = set(initial)
+    possible:dict[tuple[str, str], set[str]|None] = {}
+    def add(buffer_name:str, slot:str, value:str|None) -> bool:
+        # True if the value was not possible before
+        values = possible.setdefault((buffer_name, slot), set())
+        if values is _ANY or value in values:
+            return False
+        if value is _ANY:
+            possible[(buffer_name, slot)] = _ANY
+        else:
+            values.add(value)
+        return True
+    for buffer_name, chunks in initial.items():
+        for chunk in chunks:
+            for slot in chunk.keys():
+                if slot != 'isa' and chunk[slot] not in (None, ''):
+                    add(buffer_name, slot, _plain(str(chunk[slot])))
+
+    tests = [_constant_tests(prod, buffers) for prod in productions]
+    def missing_test(index:int) -> tuple[str, str, str]|None:
+        for buffer_name, slot, value in tests[index]:
+            values = possible.get((buffer_name, slot), set())
+            if values is not _ANY and value not in values:
+                return buffer_name, slot, value
+        return None
+
+    # productions that can fire set values, which may enable more productions; productions wait for the first test that is missing
+    waiting:dict[tuple[str, str], dict[str, list[int]]] = {}
+    pending = list(range(len(productions) - 1, -1, -1))
+    while pending:
+        index = pending.pop()
+        missing = missing_test(index)
+        if missing is not None:
+            buffer_name, slot, value = missing
+            waiting.setdefault((buffer_name, slot), {}).setdefault(value, []).append(index)
+            continue
+        for buffer_name, slot, value in _set_values(productions[index], buffers):
+            if add(buffer_name, slot, value):
+                waiting_values = waiting.get((buffer_name, slot), {})
+                for indices in (list(waiting_values.values()) if value is _ANY else [waiting_values.get(value, [])]):
+                    pending.extend(reversed(indices))
+                if value is _ANY:
+                    waiting_values.clear()
+                else:
+                    waiting_values.pop(value, None)
+    unreachable = {}
+    for index in sorted(index for waiting_values in waiting.values() for indices in waiting_values.values() for index in indices):
+        buffer_name, slot, value = missing_test(index)
+        unreachable[index] = f"={buffer_name}> {slot} {value} is never set"
+    return unreachable
+
+
+def _generalizes(general:tuple, specific:tuple) -> bool:
+    # every test of the general LHS is also a test of the specific LHS
+    specific_rules = {(rule_type, buffer_name): set(content) for rule_type, buffer_name, content in specific}
+    for rule_type, buffer_name, content in general:
+        tests = specific_rules.get((rule_type, buffer_name))
+        if tests is None or not tests.issuperset(content):
+            return False
+    return True
+
+
+def find_redundant(productions:production_sequence|Iterable[production], initial:Mapping[Buffer|str, AdvChunk|Mapping[str, object]|Iterable[AdvChunk|Mapping[str, object]]]|None=None) -> RedundancyReport:
+    # initial: contents of the buffers that are only changed by the productions at the start of a simulation (e.g., {Buffer.GOAL: SimpleGoalChunk(phase='start')}); only these buffers are analyzed for unreachable productions
+    # duplicates and subsumed productions must have the same reward; the kept duplicate is the one with the highest utility, a subsumed production has to come after the more general one in conflict resolution (the others can only be selected with utility noise)
+    productions = productions if isinstance(productions, production_sequence) else production_sequence(list(productions))
+    prods = list(productions)
+    findings:dict[int, Redundancy] = {}
+
+    if initial is not None:
+        initial_chunks = {}
+        for buffer, chunks in initial.items():
+            buffer_name = buffer.value if isinstance(buffer, Buffer) else buffer
+            initial_chunks[buffer_name] = [chunks] if isinstance(chunks, (AdvChunk, Mapping)) else list(chunks)
+        for index, detail in _unreachable(prods, initial_chunks).items():
+            findings[index] = Redundancy(RedundancyKind.UNREACHABLE, prods[index], None, detail)
+
+    # duplicates: same signature and reward
+    signatures = [signature(prod) for prod in prods]
+    groups:dict[tuple, list[int]] = {}
+    for index, prod in enumerate(prods):
+        if index not in findings:
+            groups.setdefault((signatures[index], prod.get_reward()), []).append(index)
+    representatives = []
+    for indices in groups.values():
+        kept = max(indices, key=lambda index: (prods[index].get_utility(), -index))
+        representatives.append(kept)
+        for index in indices:
+            if index != kept:
+                findings[index] = Redundancy(RedundancyKind.DUPLICATE, prods[index], prods[kept], 'same rules as the kept production')
+
+    # subsumed: a more general LHS with the same RHS and reward that comes first in conflict resolution (higher utility, or the same utility and added earlier), so the specific production can never be selected
+    # a more general production with a lower utility is no replacement: another production could be selected instead of it
+    def ranks_before(other:int, index:int) -> bool:
+        return (-prods[other].get_utility(), other) < (-prods[index].get_utility(), index)
+    by_rhs:dict[tuple, list[int]] = {}
+    for index in sorted(representatives):
+        by_rhs.setdefault((signatures[index][1], prods[index].get_reward()), []).append(index)
+    for indices in by_rhs.values():
+        if len(indices) < 2:
+            continue
+        generals = {index: [other for other in indices if other != index and ranks_before(other, index) and _generalizes(signatures[other][0], signatures[index][0])] for index in indices}
+        for index, others in generals.items():
+            # the most general production is kept (one that is not subsumed itself)
+            cause = next((other for other in others if not generals[other]), None)
+            if cause is not None:
+                findings[index] = Redundancy(RedundancyKind.SUBSUMED, prods[index], prods[cause], 'more specific tests with the same actions')
+
+    return RedundancyReport(productions, [findings[index] for index in sorted(findings)])
@@ -3,68 +3,182 @@ Base implementation for rules, rule sequences, productions, and production seque
 """
 
 from __future__ import annotations
-from typing import Callable
+import io
+import os
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Mapping, TextIO
 from copy import copy
-from pyactr import ACTRModel
+from weakref import WeakValueDictionary
 
 from pyactr_oo_syntax.base.chunk import AdvChunk
+from pyactr_oo_syntax.base.compilation import CompiledProduction, CompiledRule, add_compiled_production, compile_rule
 from pyactr_oo_syntax.helpers.data_types import RuleType, Buffer
+from pyactr_oo_syntax.helpers.persistent_sequence import PersistentSequence, WriteBackList
+
+if TYPE_CHECKING:
+    from pyactr import ACTRModel
+
+
+## Interning ##
+
+# in interned mode, identical rules (and their chunks) are shared between all rule sequences and productions instead of being kept as separate objects
+_interning:bool = False
+_interned_rules:WeakValueDictionary[tuple, rule_] = WeakValueDictionary()
+
+def set_interning(enabled:bool=True):
+    global _interning
+    _interning = enabled
+
+def is_interning() -> bool:
+    return _interning
+
+def _share(rule:rule_) -> rule_:
+    return rule.interned() if _interning else rule
 
 
 ## Foundation Classes: rule_, rule_sequence_, production, production_sequence ##
 
 class rule_():
+    # rules are immutable (no state changes after __init__), hence hashable and safe to share
+    __slots__ = ('__rule_type', '__buffer', '__content', '__key', '__string', '__weakref__')
+
     def __init__(self, rule_type:RuleType, buffer_name:Buffer|Callable[[str|None],str], imaginal_buffer_name:str|None=None, isa:str|None=None, **chunk_content):
         self.__rule_type:RuleType = rule_type
         self.__buffer:Buffer|str = buffer_name(imaginal_buffer_name) if isinstance(buffer_name, Callable) else buffer_name
-        self.__content:AdvChunk|str|None = None
+        self.__content:AdvChunk|dict[str, str]|None = None
         if rule_type == RuleType.QUERY:
-            self.__content = '\n'.join([f"{key} {value}" for key, value in chunk_content.items() if value != None])
+            self.__content = {key: str(value) for key, value in chunk_content.items() if value != None}
         elif isa != None:
             self.__content = AdvChunk(isa, **chunk_content)
+        self.__key:tuple|None = None
+        self.__string:str|None = None
 
     def __str__(self):
-        return f"{self.__rule_type.value}{self.__buffer.value if isinstance(self.__buffer, Buffer) else self.__buffer}>{'\n'+str(self.__content) if self.__content else ''}"
+        if self.__string is None:
+            self.__string = self._text()
+        return self.__string
+
+    def _text(self) -> str:
+        # the string without caching it (for streaming large sequences, see `production_sequence.iter_str`)
+        if self.__string is not None:
+            return self.__string
+        items = self.__content._iter_str_items() if isinstance(self.__content, AdvChunk) else self.get_content()
+        content = '\n'.join(map(' '.join, items))
+        return f"{self.__rule_type.value}{self.get_buffer_name()}>{'\n'+content if content else ''}"
+
+    def __eq__(self, other:object) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, rule_):
+            return self.get_key() == other.get_key()
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.get_key())
+
+    def __copy__(self) -> rule_:
+        return self
+
+    def get_key(self) -> tuple:
+        if self.__key is None:
+            self.__key = (self.__rule_type.value, self.get_buffer_name(), tuple(self.get_content()))
+        return self.__key
+
+    def interned(self) -> rule_:
+        rule = _interned_rules.get(self.get_key())
+        if rule is None:
+            if isinstance(self.__content, AdvChunk):
+                self.__content = self.__content.interned()
+            rule = _interned_rules.setdefault(self.get_key(), self)
+        return rule
+
+    def get_rule_type(self) -> RuleType:
+        return self.__rule_type
+
+    def get_buffer_name(self) -> str:
+        return self.__buffer.value if isinstance(self.__buffer, Buffer) else self.__buffer
+
+    def get_content(self) -> list[tuple[str, str]]:
+        if isinstance(self.__content, AdvChunk):
+            return self.__content.str_items()
+        return list(self.__content.items()) if self.__content else []
+
+    def compile(self, lhs:bool) -> CompiledRule:
+        return compile_rule(self.__rule_type, self.get_buffer_name(), self.get_content(), lhs=lhs)
 
     def __and__(self, other:rule_|rule_sequence_) -> rule_sequence_:
         if isinstance(other, rule_):
-            return rule_sequence_(rules=[copy(self), copy(other)])
+            return rule_sequence_(rules=[_share(self), _share(other)])
         elif isinstance(other, rule_sequence_):
-            return rule_sequence_(rules=[copy(self)]) & other
+            return rule_sequence_(rules=[_share(self)]) & other
         else:
             return NotImplemented
         
     def __rshift__(self, other:rule_|rule_sequence_) -> production:
         if isinstance(other, rule_):
-            return production(lhs=rule_sequence_(rules=[copy(self)]), rhs=rule_sequence_(rules=[copy(other)]))
+            return production(lhs=rule_sequence_(rules=[_share(self)]), rhs=rule_sequence_(rules=[_share(other)]))
         elif isinstance(other, rule_sequence_):
-            return production(lhs=rule_sequence_(rules=[copy(self)]), rhs=copy(other))
+            return production(lhs=rule_sequence_(rules=[_share(self)]), rhs=copy(other))
         else:
             return NotImplemented
 
 
 class rule_sequence_():
-    def __init__(self, rules: list[rule_]):
-        self.rules: list[rule_] = rules
+    # rules are held in a persistent sequence: combining shares the structure of both operands instead of copying them, the operands stay unchanged
+    def __init__(self, rules: Iterable[rule_]|PersistentSequence[rule_]):
+        self.__rules: PersistentSequence[rule_] = rules if isinstance(rules, PersistentSequence) else PersistentSequence(rules)
+        self.__string:str|None = None
+        self.__version:int = 0 # changed with `rules`, so productions with this sequence know that their caches are outdated
+
+    @property
+    def rules(self) -> list[rule_]:
+        # changing the list in place is deprecated (the change is written back to the sequence with a DeprecationWarning); use `rules = ...` or & to change the rules
+        return WriteBackList(self.__rules.flatten(), 'rules', self.__set_rules)
+
+    def __set_rules(self, rules:list[rule_]):
+        self.rules = rules
+
+    @rules.setter
+    def rules(self, rules:Iterable[rule_]):
+        self.__rules = PersistentSequence(rules)
+        self.__string = None
+        self.__version += 1
+
+    @property
+    def version(self) -> int:
+        return self.__version
+
+    def __iter__(self) -> Iterator[rule_]:
+        return iter(self.__rules)
+
+    def __len__(self) -> int:
+        return len(self.__rules)
 
     def __str__(self) -> str:
-        return '\n'.join(map(str, self.rules))  
+        # rules are immutable and combining creates new sequences, so the string only changes with `rules`
+        if self.__string is None:
+            self.__string = '\n'.join(map(str, self.__rules))
+        return self.__string
+
+    def _text(self) -> str:
+        # see `rule_._text`
+        if self.__string is not None:
+            return self.__string
+        return '\n'.join(rule._text() for rule in self.__rules)
+
+    def compile(self, lhs:bool) -> tuple[CompiledRule, ...]:
+        return tuple(rule.compile(lhs=lhs) for rule in self.__rules)
 
     def __and__(self, other:rule_|rule_sequence_) -> rule_sequence_:
         if isinstance(other, rule_):
-            new_rules = copy(self.rules)
-            new_rules.append(other)
-            return rule_sequence_(rules=new_rules)
+            return rule_sequence_(rules=self.__rules.append(_share(other)))
         elif isinstance(other, rule_sequence_):
-            new_rules = copy(self.rules)
-            new_rules.extend(other.rules)
-            return rule_sequence_(rules=new_rules)
+            return rule_sequence_(rules=self.__rules + other.__rules)
         else:
             return NotImplemented
 
     def __rshift__(self, other:rule_|rule_sequence_) -> production:
         if isinstance(other, rule_):
-            return production(lhs=copy(self), rhs=rule_sequence_(rules=[copy(other)]))
+            return production(lhs=copy(self), rhs=rule_sequence_(rules=[_share(other)]))
         elif isinstance(other, rule_sequence_):
             return production(lhs=copy(self), rhs=copy(other))
         else:
@@ -78,13 +192,35 @@ class production:
         self.__rhs: rule_sequence_ = rhs
         self.__utility:int = 0
         self.__reward:float|None = None
+        self.__compiled:CompiledProduction|None = None
+        self.__string:str|None = None
+        self.__versions:tuple[int, int] = (lhs.version, rhs.version) # of the sides when the caches were filled
+
+    def __check_sides(self):
+        # the rules of a side can be replaced (`get_lhs().rules = ...`), which outdates the string and the compiled form
+        versions = (self.__lhs.version, self.__rhs.version)
+        if versions != self.__versions:
+            self.__versions = versions
+            self.__string = None
+            self.__compiled = None
 
     def __str__(self):
-        return f"{str(self.__lhs)}\n==>\n{str(self.__rhs)}"
+        # name, utility, and reward are not part of the string, so it only depends on the sides
+        self.__check_sides()
+        if self.__string is None:
+            self.__string = f"{str(self.__lhs)}\n==>\n{str(self.__rhs)}"
+        return self.__string
+
+    def _text(self) -> str:
+        # see `rule_._text`
+        self.__check_sides()
+        if self.__string is not None:
+            return self.__string
+        return f"{self.__lhs._text()}\n==>\n{self.__rhs._text()}"
     
     def __and__(self, other:rule_|rule_sequence_) -> production:
         if isinstance(other, rule_):
-            return production(lhs=copy(self.__lhs), rhs=self.__rhs & rule_sequence_(rules=[copy(other)]))
+            return production(lhs=copy(self.__lhs), rhs=self.__rhs & rule_sequence_(rules=[_share(other)]))
         elif isinstance(other, rule_sequence_):
             return production(lhs=copy(self.__lhs), rhs=self.__rhs & other)
         else:
@@ -92,7 +228,7 @@ class production:
 
     def __rand__(self, other:rule_|rule_sequence_) -> production:
         if isinstance(other, rule_):
-            return production(lhs=rule_sequence_(rules=[copy(other)]) & self.__lhs, rhs=copy(self.__rhs))
+            return production(lhs=rule_sequence_(rules=[_share(other)]) & self.__lhs, rhs=copy(self.__rhs))
         elif isinstance(other, rule_sequence_):
             return production(lhs=other & self.__lhs, rhs=copy(self.__rhs))
         else:
@@ -110,19 +246,47 @@ class production:
     def get_name(self) -> str|None:
         return self.__name
 
+    def get_lhs(self) -> rule_sequence_:
+        return self.__lhs
+
+    def get_rhs(self) -> rule_sequence_:
+        return self.__rhs
+
+    def get_utility(self) -> int:
+        return self.__utility
+
+    def get_reward(self) -> float|None:
+        return self.__reward
+
     def set_name(self, name:str) -> production:
         self.__name = name
+        self.__compiled = None
         return self
 
     def set_utility(self, utility:int) -> production:
         self.__utility = utility
+        self.__compiled = None
         return self
 
     def set_reward(self, reward:float) -> production:
         self.__reward = reward
+        self.__compiled = None
         return self
 
-    def add_to_model(self, model:ACTRModel, production_name:str|None=None, utility:int=0, reward:float|None=None) -> production:
+    def compile(self) -> CompiledProduction:
+        # rules are immutable, so the compiled form only changes with name, utility, reward, or the rules of a side
+        self.__check_sides()
+        if self.__compiled is None:
+            self.__compiled = CompiledProduction(
+                name=self.__name if self.__name else '',
+                lhs=self.__lhs.compile(lhs=True),
+                rhs=self.__rhs.compile(lhs=False),
+                utility=self.__utility,
+                reward=self.__reward
+            )
+        return self.__compiled
+
+    def add_to_model(self, model:ACTRModel, production_name:str|None=None, utility:int=0, reward:float|None=None, compiled:bool=True) -> production:
         if production_name:
             self.set_name(production_name)
         if utility:
@@ -134,46 +298,112 @@ class production:
         if not self.get_name():
             self.set_name('unnamedrule' + str(model.productions._undefinedrulecounter))
 
-        model.productionstring(
-            name=self.__name if self.__name else '',
-            string=str(self),
-            utility=self.__utility,
-            reward=self.__reward
-        )
+        # compiled: rules are converted directly into pyactr's structures; otherwise pyactr parses the string representation (both result in the same model)
+        if compiled:
+            add_compiled_production(model, self.compile())
+        else:
+            model.productionstring(
+                name=self.__name if self.__name else '',
+                string=str(self),
+                utility=self.__utility,
+                reward=self.__reward
+            )
 
         return self
     
 
 class production_sequence:
-    def __init__(self, productions:list[production]):
-        self.productions: list[production] = productions
+    # productions are held in a persistent sequence (see rule_sequence_)
+    def __init__(self, productions:Iterable[production]|PersistentSequence[production]):
+        self.__productions: PersistentSequence[production] = productions if isinstance(productions, PersistentSequence) else PersistentSequence(productions)
+
+    @property
+    def productions(self) -> list[production]:
+        # changing the list in place is deprecated (see `rule_sequence_.rules`); use `productions = ...` or + to change the productions
+        return WriteBackList(self.__productions.flatten(), 'productions', self.__set_productions)
+
+    def __set_productions(self, productions:list[production]):
+        self.productions = productions
+
+    @productions.setter
+    def productions(self, productions:Iterable[production]):
+        self.__productions = PersistentSequence(productions)
+
+    def __iter__(self) -> Iterator[production]:
+        return iter(self.__productions)
+
+    def __len__(self) -> int:
+        return len(self.__productions)
 
     def __str__(self) -> str:
-        return '\n\n'.join(map(str, self.productions))
+        return '\n\n'.join(map(str, self.__productions))
+
+    def iter_str(self) -> Iterator[str]:
+        # pieces of `str(self)` (one per production and separator), so large sequences can be written without building the whole string; the strings are not cached by the rules and productions, so they are not kept in memory afterwards
+        for index, prod in enumerate(self.__productions):
+            if index:
+                yield '\n\n'
+            yield prod._text()
+
+    def write(self, target:str|os.PathLike|TextIO|io.RawIOBase|io.BufferedIOBase, encoding:str='utf-8', buffer_size:int=1 << 16) -> int:
+        # streams `str(self)` to a file path, a text or binary file object, or a socket (anything with `sendall`) in pieces of about buffer_size characters; returns the number of characters written
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, 'w', encoding=encoding) as file:
+                return self.write(file, buffer_size=buffer_size)
+        if hasattr(target, 'sendall'):
+            send = lambda text: target.sendall(text.encode(encoding))
+        elif isinstance(target, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(target, 'mode', ''):
+            send = lambda text: target.write(text.encode(encoding))
+        else:
+            send = target.write
+
+        written, pending, pending_size = 0, [], 0
+        for piece in self.iter_str():
+            pending.append(piece)
+            pending_size += len(piece)
+            if pending_size >= buffer_size:
+                send(''.join(pending))
+                written += pending_size
+                pending, pending_size = [], 0
+        if pending:
+            send(''.join(pending))
+            written += pending_size
+        return written
 
     def __add__(self, other:production|production_sequence) -> production_sequence:
         if isinstance(other, production):
-            new_productions = copy(self.productions)
-            new_productions.append(other)
-            return production_sequence(productions=new_productions)
+            return production_sequence(productions=self.__productions.append(other))
         elif isinstance(other, production_sequence):
-            new_productions = copy(self.productions)
-            new_productions.extend(other.productions)
-            return production_sequence(productions=new_productions)
+            return production_sequence(productions=self.__productions + other.__productions)
         else:
             return NotImplemented
         
     def __radd__(self, other:production|production_sequence) -> production_sequence:
         if isinstance(other, production):
-            new_productions = copy(self.productions)
-            new_productions.insert(0, other)
-            return production_sequence(productions=new_productions)
+            return production_sequence(productions=self.__productions.prepend(other))
         elif isinstance(other, production_sequence):
-            self.productions = other.productions + self.productions
-            return self
+            return production_sequence(productions=other.__productions + self.__productions)
+        else:
+            return NotImplemented
+
+    def pruned(self, initial:Mapping[Buffer|str, object]|None=None, normalize:bool=True) -> production_sequence:
+        # the sequence without duplicate, subsumed, and (given the initial buffer contents) unreachable productions; see `find_redundant` in `base/redundancy.py` for the report
+        from pyactr_oo_syntax.base.redundancy import find_redundant
+        return find_redundant(self, initial=initial).pruned(normalize=normalize)
 
-    def add_to_model(self, model:ACTRModel) -> production_sequence:
-        for production in self.productions:
-            production.add_to_model(model)
+    def add_to_model(self, model:ACTRModel, compiled:bool=True, indexed:bool=False, profiled:bool=False, pruned:bool=False) -> production_sequence:
+        # indexed: in the model's simulations, conflict resolution only tests the productions whose constant slot tests match the current buffer contents (see `runtime/conflict_index.py`)
+        # profiled: firings, match attempts and matching time of every production are recorded in the model's simulations (see `runtime/profiler.py`, results via `get_profile(model)`)
+        # pruned: duplicate and subsumed productions are left out (see `pruned`), the others are added unchanged (not normalized); the sequence that was added is returned
+        if pruned:
+            return self.pruned(normalize=False).add_to_model(model, compiled=compiled, indexed=indexed, profiled=profiled)
+        for production in self.__productions:
+            production.add_to_model(model, compiled=compiled)
+        if indexed:
+            from pyactr_oo_syntax.runtime.conflict_index import install_conflict_index
+            install_conflict_index(model)
+        if profiled:
+            from pyactr_oo_syntax.runtime.profiler import install_profiler
+            install_profiler(model)
         return self
 
@@ -0,0 +1,113 @@
+"""
+Production templates: a production is written once with placeholders (e.g., `phase=Placeholder('phase')` or `key='item_{index}'`) and expanded lazily into many productions, e.g., over a grid of slot values or the phases of a `Sequence`.
+"""
+
+from __future__ import annotations
+from enum import Enum
+from itertools import product
+from string import Formatter
+from typing import Iterable, Iterator, Mapping
+
+from pyactr_oo_syntax.base.rule_and_production import _share, production, rule_, rule_sequence_
+from pyactr_oo_syntax.helpers.data_types import RuleType
+from pyactr_oo_syntax.helpers.enum_sequence import Sequence
+
+
+class Placeholder:
+    __slots__ = ('name',)
+
+    def __init__(self, name:str):
+        self.name = name
+
+    def __str__(self):
+        return '{' + self.name + '}'
+
+
+def _is_template(value:str) -> bool:
+    return '{' in value
+
+
+def _placeholder_names(value:str) -> list[str]:
+    return [name for _, name, _, _ in Formatter().parse(value) if name]
+
+
+class _RuleTemplate:
+    # rules without placeholders are reused as they are; only the others are created anew for every expansion
+    __slots__ = ('rule', 'rule_type', 'buffer_name', 'content')
+
+    def __init__(self, rule:rule_):
+        self.rule:rule_|None = rule
+        self.rule_type:RuleType = rule.get_rule_type()
+        self.buffer_name:str = rule.get_buffer_name()
+        self.content:list[tuple[str, str]] = rule.get_content()
+        if any(_is_template(value) for _, value in self.content):
+            self.rule = None
+
+    def placeholders(self) -> set[str]:
+        return {name for _, value in self.content for name in _placeholder_names(value)}
+
+    def instantiate(self, params:Mapping[str, object]) -> rule_:
+        if self.rule is not None:
+            return self.rule
+        content = {slot: value.format_map(params) if _is_template(value) else value for slot, value in self.content}
+        isa = content.pop('isa', None)
+        return _share(rule_(rule_type=self.rule_type, buffer_name=self.buffer_name, isa=isa, **content))
+
+
+class ProductionTemplate:
+    def __init__(self, template:production, name:str|None=None):
+        # name: format string for the names of the productions (e.g., 'next_{phase}'); without placeholders, the values of the placeholders are appended
+        self.__name:str = name if name is not None else (template.get_name() or 'template')
+        self.__lhs:list[_RuleTemplate] = [_RuleTemplate(rule) for rule in template.get_lhs()]
+        self.__rhs:list[_RuleTemplate] = [_RuleTemplate(rule) for rule in template.get_rhs()]
+        self.__utility:int = template.get_utility()
+        self.__reward:float|None = template.get_reward()
+        self.__placeholders:list[str] = sorted(set().union(*(rule.placeholders() for rule in self.__lhs + self.__rhs)))
+
+    def placeholders(self) -> list[str]:
+        return list(self.__placeholders)
+
+    def instantiate(self, **params) -> production:
+        # enum members (e.g., phases of a Sequence) are replaced by their values
+        params = {key: value.value if isinstance(value, Enum) else value for key, value in params.items()}
+        missing = [name for name in self.__placeholders if name not in params]
+        if missing:
+            raise KeyError(f"No value for the placeholder(s) {', '.join(missing)} of template '{self.__name}'")
+
+        if _is_template(self.__name):
+            name = self.__name.format_map(params)
+        else:
+            name = '_'.join([self.__name, *(str(params[key]) for key in self.__placeholders)])
+
+        prod = production(
+            lhs=rule_sequence_(rules=[rule.instantiate(params) for rule in self.__lhs]),
+            rhs=rule_sequence_(rules=[rule.instantiate(params) for rule in self.__rhs])
+        )
+        prod.set_name(name).set_utility(self.__utility)
+        if self.__reward is not None:
+            prod.set_reward(self.__reward)
+        return prod
+
+    def expand(self, params:Iterable[Mapping[str, object]]) -> Iterator[production]:
+        for values in params:
+            yield self.instantiate(**values)
+
+    def expand_grid(self, **values:Iterable) -> Iterator[production]:
+        # Cartesian product of the values of each placeholder, e.g., expand_grid(color=['red', 'blue'], index=range(3))
+        keys = list(values.keys())
+        for combination in product(*(list(values[key]) for key in keys)):
+            yield self.instantiate(**dict(zip(keys, combination)))
+
+    def expand_phases(self, phases:type[Sequence], phase:str='phase', next_phase:str|None='next_phase', prev_phase:str|None=None, cyclic:bool=False, **values:Iterable) -> Iterator[production]:
+        # one production per phase (times the grid of further values), with its successor / predecessor under next_phase / prev_phase; without cyclic, the last phase (first phase for prev_phase) is skipped
+        members = list(phases)
+        first, last = members[0], members[-1]
+        for member in members:
+            if not cyclic and ((next_phase and member is last) or (prev_phase and member is first)):
+                continue
+            phase_values = {phase: [member]}
+            if next_phase:
+                phase_values[next_phase] = [member.next()]
+            if prev_phase:
+                phase_values[prev_phase] = [member.prev()]
+            yield from self.expand_grid(**phase_values, **values)
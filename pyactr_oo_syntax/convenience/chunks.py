@@ -6,6 +6,8 @@ from pyactr_oo_syntax.base.chunk import AdvChunk
 from pyactr_oo_syntax.helpers.data_types import static_chunk_slot
 
 class SimpleGoalChunk(AdvChunk):
+    __slots__ = ()
+
     @static_chunk_slot
     def isa(cls) -> str:
         return 'goal'
@@ -15,6 +17,8 @@ class SimpleGoalChunk(AdvChunk):
 
 
 class VisuallocationChunk(AdvChunk):
+    __slots__ = ()
+
     @static_chunk_slot
     def isa(cls) -> str:
         return '_visuallocation'
@@ -28,6 +32,8 @@ class VisuallocationChunk(AdvChunk):
 
 
 class VisualChunk(AdvChunk):
+    __slots__ = ()
+
     @static_chunk_slot
     def isa(cls) -> str:
         return '_visual'
@@ -41,6 +47,8 @@ class VisualChunk(AdvChunk):
 
 
 class ManualChunk(AdvChunk):
+    __slots__ = ()
+
     @static_chunk_slot
     def isa(cls) -> str:
         return '_manual'
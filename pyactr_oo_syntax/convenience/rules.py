@@ -14,6 +14,8 @@ from pyactr_oo_syntax.convenience.chunks import SimpleGoalChunk, ManualChunk
 ## Basic Rules ##
 
 class request_(rule_):
+    __slots__ = ()
+
     def __init__(self, buffer_name:Buffer|Callable[[str|None],str], imaginal_buffer_name:str|None=None, isa:str|None=None, **chunk_content):
         super().__init__(rule_type=RuleType.REQUEST, buffer_name=buffer_name, imaginal_buffer_name=imaginal_buffer_name, isa=isa, **chunk_content) 
 
@@ -23,6 +25,8 @@ class request_(rule_):
 
 
 class subsumption_(rule_):
+    __slots__ = ()
+
     def __init__(self, buffer_name:Buffer|Callable[[str|None],str], imaginal_buffer_name:str|None=None, isa:str|None=None, **chunk_content):
         super().__init__(rule_type=RuleType.SUBSUMPTION, buffer_name=buffer_name, imaginal_buffer_name=imaginal_buffer_name, isa=isa, **chunk_content) 
 
@@ -32,6 +36,8 @@ class subsumption_(rule_):
 
 
 class query_(rule_):
+    __slots__ = ()
+
     def __init__(self, buffer_name:Buffer|Callable[[str|None],str], imaginal_buffer_name:str|None=None, status:BufferQuery|None=None):
         if status:
             super().__init__(rule_type=RuleType.QUERY, buffer_name=buffer_name, imaginal_buffer_name=imaginal_buffer_name, **(status.value)) 
@@ -44,6 +50,8 @@ class query_(rule_):
 
 
 class flush_(rule_):
+    __slots__ = ()
+
     def __init__(self, buffer_name:Buffer|Callable[[str|None],str], imaginal_buffer_name:str|None=None, isa:str|None=None, **chunk_content):
         super().__init__(rule_type=RuleType.FLUSH, buffer_name=buffer_name, imaginal_buffer_name=imaginal_buffer_name, isa=isa, **chunk_content) 
 
@@ -56,6 +64,8 @@ class flush_(rule_):
 ## Special Rules ##
 
 class is_simple_goal_(rule_):
+    __slots__ = ()
+
     def __init__(self, phase:str, **_):
         super().__init__(rule_type=RuleType.SUBSUMPTION, buffer_name=Buffer.GOAL, isa='goal', phase=phase)
 
@@ -65,6 +75,8 @@ class is_simple_goal_(rule_):
     
 
 class is_retrieved_(rule_):
+    __slots__ = ()
+
     def __init__(self, isa:str|None=None, **content_to_compare):
         super().__init__(rule_type=RuleType.SUBSUMPTION, buffer_name=Buffer.RETRIEVAL, isa=isa, **content_to_compare)
 
@@ -74,6 +86,8 @@ class is_retrieved_(rule_):
 
 
 class retrieve_(rule_):
+    __slots__ = ()
+
     def __init__(self, isa:str|None=None, **content_to_retrieve):
         super().__init__(rule_type=RuleType.REQUEST, buffer_name=Buffer.RETRIEVAL, isa=isa, **content_to_retrieve)
 
@@ -83,6 +97,8 @@ class retrieve_(rule_):
 
 
 class press_key_(rule_):
+    __slots__ = ()
+
     def __init__(self, key:str, **_):
         super().__init__(rule_type=RuleType.REQUEST, buffer_name=Buffer.MANUAL, isa='_manual', cmd='press_key', key=key)
 
@@ -4,21 +4,23 @@ Enum implementing methods to get the previous or next element of a certain eleme
 
 from enum import Enum
 
+# successor and predecessor of every member per Sequence class, computed on first use (members are only known after the class is created)
+_neighbours:dict[type, tuple[dict, dict]] = {}
+
+def _get_neighbours(cls:type) -> tuple[dict, dict]:
+    neighbours = _neighbours.get(cls)
+    if neighbours is None:
+        members = list(cls)
+        successors = {member: members[(index + 1) % len(members)] for index, member in enumerate(members)}
+        predecessors = {member: members[index - 1] for index, member in enumerate(members)}
+        neighbours = _neighbours.setdefault(cls, (successors, predecessors))
+    return neighbours
+
 class Sequence(Enum):
     def next(self):
-        cls = self.__class__
-        members = list(cls)
-        index = members.index(self) + 1
-        if index >= len(members):
-            index = 0
-            # raise StopIteration('end of enumeration reached')
-        return members[index]
+        # the last element is followed by the first one
+        return _get_neighbours(self.__class__)[0][self]
 
     def prev(self):
-        cls = self.__class__
-        members = list(cls)
-        index = members.index(self) - 1
-        if index < 0:
-            index = len(members) - 1
-            #  raise StopIteration('end of enumeration reached')
-        return members[index]
\ No newline at end of file
+        # the first element is preceded by the last one
+        return _get_neighbours(self.__class__)[1][self]
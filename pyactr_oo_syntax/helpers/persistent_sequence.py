@@ -0,0 +1,105 @@
+"""
+Immutable sequence with structure sharing (a rope), so that appending, prepending, and concatenating are O(1) and the elements are only flattened when they are needed.
+"""
+
+from __future__ import annotations
+import warnings
+from typing import Callable, Generic, Iterable, Iterator, TypeVar
+
+T = TypeVar('T')
+
+
+class PersistentSequence(Generic[T]):
+    __slots__ = ('__items', '__left', '__right', '__length')
+
+    def __init__(self, items:Iterable[T]=()):
+        self.__items:tuple[T, ...]|None = tuple(items)
+        self.__left:PersistentSequence[T]|None = None
+        self.__right:PersistentSequence[T]|None = None
+        self.__length:int = len(self.__items)
+
+    @classmethod
+    def concat(cls, left:PersistentSequence[T], right:PersistentSequence[T]) -> PersistentSequence[T]:
+        if not len(right):
+            return left
+        if not len(left):
+            return right
+        node = cls()
+        node.__items = None
+        node.__left, node.__right = left, right
+        node.__length = len(left) + len(right)
+        return node
+
+    def __add__(self, other:PersistentSequence[T]) -> PersistentSequence[T]:
+        if isinstance(other, PersistentSequence):
+            return PersistentSequence.concat(self, other)
+        return NotImplemented
+
+    def append(self, item:T) -> PersistentSequence[T]:
+        return PersistentSequence.concat(self, PersistentSequence((item,)))
+
+    def prepend(self, item:T) -> PersistentSequence[T]:
+        return PersistentSequence.concat(PersistentSequence((item,)), self)
+
+    def flatten(self) -> tuple[T, ...]:
+        if self.__items is None:
+            # iterative to support arbitrarily deep ropes (e.g., built by appending in a loop); the result replaces the children, so every node is flattened at most once
+            items:list[T] = []
+            stack:list[PersistentSequence[T]] = [self]
+            while stack:
+                node = stack.pop()
+                if node.__items is not None:
+                    items.extend(node.__items)
+                else:
+                    stack.append(node.__right)
+                    stack.append(node.__left)
+            self.__items = tuple(items)
+            self.__left = self.__right = None
+        return self.__items
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.flatten())
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __getitem__(self, index:int|slice):
+        return self.flatten()[index]
+
+    def __repr__(self) -> str:
+        return f"PersistentSequence({list(self.flatten())!r})"
+
+
+def _writing_back(method_name:str):
+    method = getattr(list, method_name)
+    def change(self, *args, **kwargs):
+        warnings.warn(f"Changing `{self._attribute}` in place is deprecated, since the sequence keeps its elements in a persistent sequence; assign it (`{self._attribute} = [...]`) or combine sequences with the operators instead.", DeprecationWarning, stacklevel=2)
+        result = method(self, *args, **kwargs)
+        self._write_back(self)
+        return result
+    change.__name__ = method_name
+    return change
+
+
+class WriteBackList(list):
+    # list of the elements of a persistent sequence, returned by attributes such as `rules` / `productions`, so that code that changes them in place (like with the lists they used to be) keeps working
+    # every change (deprecated) is written back by assigning the whole list to the attribute again
+    __slots__ = ('_attribute', '_write_back')
+
+    def __init__(self, items:Iterable[T], attribute:str, write_back:Callable[[list], None]):
+        super().__init__(items)
+        self._attribute = attribute
+        self._write_back = write_back
+
+    __setitem__ = _writing_back('__setitem__')
+    __delitem__ = _writing_back('__delitem__')
+    __iadd__ = _writing_back('__iadd__')
+    __imul__ = _writing_back('__imul__')
+    append = _writing_back('append')
+    extend = _writing_back('extend')
+    insert = _writing_back('insert')
+    remove = _writing_back('remove')
+    pop = _writing_back('pop')
+    clear = _writing_back('clear')
+    sort = _writing_back('sort')
+    reverse = _writing_back('reverse')
@@ -0,0 +1,256 @@
+"""
+Batched activations for subsymbolic retrievals: the base-level learning, spreading activation, partial matching, and noise of all candidate chunks of a retrieval are computed with NumPy arrays in a few operations instead of one chunk at a time, with the same results as pyactr's `DecMemBuffer.retrieve` (up to floating point rounding).
+"""
+
+from __future__ import annotations
+from typing import NamedTuple
+
+import numpy as np
+from pyactr import ACTRModel, utilities
+from pyactr.chunks import Chunk
+from pyactr.declarative import DecMem, DecMemBuffer
+from pyactr.simulation import Simulation
+
+from pyactr_oo_syntax.runtime.decmem_index import IndexedDecMem, request_constraints
+from pyactr_oo_syntax.runtime.hooks import add_simulation_hook, get_production_rules, remove_simulation_hook
+
+
+class Activations(NamedTuple):
+    # one entry per chunk that can be retrieved (chunks without any base-level activation are left out, as in pyactr)
+    chunks: list[Chunk]
+    base_level: np.ndarray
+    spreading: np.ndarray
+    partial_matching: np.ndarray
+    noise: np.ndarray
+
+    @property
+    def total(self) -> np.ndarray:
+        return self.base_level + self.spreading + self.partial_matching + self.noise
+
+    def latencies(self, latency_factor:float, latency_exponent:float) -> np.ndarray:
+        return latency_factor * np.exp(-self.total * latency_exponent)
+
+    def best(self, retrieval_threshold:float) -> int|None:
+        # index of the retrieved chunk: the first chunk with the highest activation at or above the threshold
+        total = self.total
+        successful = np.flatnonzero(total >= retrieval_threshold)
+        if not len(successful):
+            return None
+        return int(successful[np.argmax(total[successful])])
+
+
+## Components ##
+
+def base_levels(time:float, decmem:DecMem, chunks:list[Chunk], bll:bool, decay:float, optimized_learning:bool=False) -> tuple[np.ndarray, np.ndarray]:
+    # base-level activations (incl. manually set activations) and a mask of the chunks that have one
+    # the presentation times of all chunks are concatenated and summed per chunk; chunks without presentations or with a presentation at (or after) `time` are left to pyactr, which ignores the latest presentation
+    values = np.zeros(len(chunks))
+    valid = np.ones(len(chunks), dtype=bool)
+    regular = np.ones(len(chunks), dtype=bool)
+    if bll and chunks:
+        times = [decmem[chunk] for chunk in chunks]
+        lengths = np.fromiter((len(presentations) for presentations in times), dtype=np.intp, count=len(times))
+        regular = lengths > 0
+        latest = np.full(len(chunks), np.inf)
+        if regular.any():
+            flat = np.concatenate([presentations for presentations, present in zip(times, regular) if present]).astype(np.float64, copy=False)
+            starts = np.concatenate(([0], np.cumsum(lengths[regular])[:-1]))
+            latest[regular] = np.maximum.reduceat(flat, starts)
+            if optimized_learning:
+                regular &= latest < time
+                values[regular] = np.log(lengths[regular] / (1 - decay)) - decay * np.log(time - latest[regular])
+            else:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    sums = np.add.reduceat((time - flat) ** -decay, starts)
+                regular[regular] = latest[regular] < time
+                values[regular] = np.log(sums[regular[lengths > 0]])
+        for index in np.flatnonzero(~regular):
+            try:
+                values[index] = utilities.baselevel_learning(time, times[index], bll, decay, decmem.activations.get(chunks[index]), optimized_learning=optimized_learning)
+            except UnboundLocalError:
+                valid[index] = False
+
+    if decmem.activations:
+        for index in np.flatnonzero(regular):
+            activation = decmem.activations.get(chunks[index])
+            if activation is not None:
+                values[index] = np.log(np.exp(values[index]) + np.exp(activation))
+    return values, valid
+
+
+def _fans(decmem:DecMem, sources:list[tuple[str, object]], restricted:bool) -> np.ndarray:
+    # 1 + number of slots with the value j of each source (in the source's slot, if restricted), cached in the counters of the declarative memory like pyactr does; fans that are not cached yet are counted in one pass over declarative memory
+    counter = decmem.restricted_number_chunks if restricted else decmem.unrestricted_number_chunks
+    keys = [(slot, value) if restricted else value for slot, value in sources]
+    missing = {key: 1 for key in keys if key not in counter}
+    if missing:
+        for chunk in decmem:
+            for slot, slot_value in chunk:
+                slot_value = utilities.splitting(slot_value).values
+                if slot_value:
+                    key = (slot, slot_value) if restricted else slot_value
+                    if key in missing:
+                        missing[key] += 1
+        counter.update(missing)
+    return np.fromiter((counter[key] for key in keys), dtype=np.float64, count=len(keys))
+
+
+def association_strengths(decmem:DecMem, chunks:list[Chunk], sources:list[tuple[str, object]], strength_of_association:float, restricted:bool=False, only_chunks:bool=True) -> np.ndarray:
+    # S_ji = S - ln(fan_j / slots_ij) for every source (slot, value j) (rows) and chunk i (columns), 0 where j is neither i nor one of its values (restricted: not the value of i in the source's slot)
+    # the values of every chunk are looked up once in a table of the sources, slots_ij are counted into an array, and the strengths are computed for all pairs at once
+    strengths = np.zeros((len(sources), len(chunks)))
+    if not sources or not chunks:
+        return strengths
+    rows_of:dict[object, list[int]] = {}
+    for row, (slot, value) in enumerate(sources):
+        rows_of.setdefault(value, []).append(row)
+
+    count_rows, count_columns, match_rows, match_columns = [], [], [], []
+    for column, chunk in enumerate(chunks):
+        for slot, value in utilities.find_chunks(chunk, only_chunks).items():
+            for row in rows_of.get(value, ()):
+                count_rows.append(row)
+                count_columns.append(column)
+                if not restricted or sources[row][0] == slot:
+                    match_rows.append(row)
+                    match_columns.append(column)
+        if not restricted:
+            for row in rows_of.get(chunk, ()):
+                match_rows.append(row)
+                match_columns.append(column)
+    if not match_rows:
+        return strengths
+
+    slots_ij = np.zeros(strengths.shape)
+    np.add.at(slots_ij, (np.asarray(count_rows, dtype=np.intp), np.asarray(count_columns, dtype=np.intp)), 1)
+    matched = np.zeros(strengths.shape, dtype=bool)
+    matched[np.asarray(match_rows, dtype=np.intp), np.asarray(match_columns, dtype=np.intp)] = True
+    fans = _fans(decmem, sources, restricted)
+    values = strength_of_association - np.log(fans[:, None] / np.maximum(1, slots_ij))
+    strengths[matched] = values[matched]
+    return strengths
+
+
+def spreading_activations(decmem:DecMem, chunks:list[Chunk], buffers:dict, model_parameters:dict) -> np.ndarray:
+    # sum over buffers k and their values j of W_kj * S_ji (see `association_strengths`)
+    only_chunks = model_parameters['association_only_from_chunks']
+    sources, weights = [], []
+    for name, weight in model_parameters['buffer_spreading_activation'].items():
+        try:
+            source = list(buffers[name])[0]
+        except IndexError:
+            continue
+        weight_kj = utilities.weigh_buffer(source, weight, only_chunks)
+        for slot_value in utilities.find_chunks(source, only_chunks).items():
+            sources.append(slot_value)
+            weights.append(weight_kj)
+    if not sources:
+        return np.zeros(len(chunks))
+    strengths = association_strengths(decmem, chunks, sources, model_parameters['strength_of_association'], model_parameters['spreading_activation_restricted'], only_chunks)
+    return np.asarray(weights) @ strengths
+
+
+def instantaneous_noise(size:int, instantaneous_noise:float) -> np.ndarray:
+    # one draw for all chunks, which gives the same values as pyactr's draws one chunk at a time (in the order of the chunks)
+    assert instantaneous_noise >= 0, "Instantaneous noise must be positive"
+    if instantaneous_noise == 0 or not size:
+        return np.zeros(size)
+    return np.random.logistic(0, instantaneous_noise, size)
+
+
+def compute_activations(time:float, decmem:DecMem, chunk_tobe_matched:Chunk, chunks:list[Chunk], buffers:dict, model_parameters:dict) -> Activations:
+    # chunks: candidates in the order of declarative memory (without the chunks excluded by the finst test); without partial matching, chunks that do not match are dropped
+    if model_parameters['partial_matching']:
+        mismatch_penalty = model_parameters['mismatch_penalty']
+        partial_matching = np.fromiter((chunk_tobe_matched.match(chunk, partialmatching=True, mismatch_penalty=mismatch_penalty) for chunk in chunks), dtype=np.float64, count=len(chunks))
+    else:
+        chunks = [chunk for chunk in chunks if chunk_tobe_matched <= chunk]
+        partial_matching = np.zeros(len(chunks))
+
+    base_level, valid = base_levels(time, decmem, chunks, model_parameters['baselevel_learning'], model_parameters['decay'], model_parameters['optimized_learning'])
+    if not valid.all():
+        chunks = [chunk for chunk, present in zip(chunks, valid) if present]
+        base_level, partial_matching = base_level[valid], partial_matching[valid]
+    unknown = np.flatnonzero(np.isnan(base_level))
+    if len(unknown):
+        raise utilities.ACTRError("The following chunk cannot receive base activation: %s. The reason is that one of its traces did not appear in a past moment." % chunks[unknown[0]])
+
+    return Activations(
+        chunks=chunks,
+        base_level=base_level,
+        spreading=spreading_activations(decmem, chunks, buffers, model_parameters),
+        partial_matching=partial_matching,
+        noise=instantaneous_noise(len(chunks), model_parameters['instantaneous_noise'])
+    )
+
+
+## Retrievals ##
+
+def batch_retrievals(buffer:DecMemBuffer) -> DecMemBuffer:
+    # `retrieve` is wrapped on this buffer instance only (once); subsymbolic retrievals compute the activations of all candidates at once, everything else (and `activation_trace`, which prints every chunk) is left to pyactr
+    if getattr(buffer.retrieve, 'batched', False):
+        return buffer
+    retrieve = buffer.retrieve
+    def batched_retrieve(time, otherchunk, actrvariables, buffers, extra_tests, model_parameters):
+        parameters = {**model_parameters, **buffer.model_parameters}
+        if not parameters['subsymbolic'] or parameters['activation_trace']:
+            return retrieve(time, otherchunk, actrvariables, buffers, extra_tests, model_parameters)
+        try:
+            mod_attr_val = {slot: utilities.check_bound_vars(actrvariables or {}, value, negative_impossible=False) for slot, value in otherchunk.removeunused()}
+        except utilities.ACTRError as arg:
+            raise utilities.ACTRError("Retrieving the chunk '%s' is impossible; %s" % (otherchunk, arg))
+        chunk_tobe_matched = Chunk(otherchunk.typename, **mod_attr_val)
+
+        decmem = buffer.dm
+        candidates = None
+        if isinstance(decmem, IndexedDecMem) and not parameters['partial_matching']:
+            constraints = request_constraints(otherchunk, actrvariables)
+            candidates = decmem.candidates(constraints) if constraints else None
+        chunks = list(decmem) if candidates is None else candidates
+
+        # finst: recently retrieved chunks are excluded (or required) if the request tests `recently_retrieved`
+        recently_retrieved = extra_tests.get('recently_retrieved')
+        if buffer.finst and recently_retrieved is not None:
+            recent = set(buffer.recent)
+            if recently_retrieved == False or recently_retrieved == 'False':
+                chunks = [chunk for chunk in chunks if chunk not in recent]
+            else:
+                chunks = [chunk for chunk in chunks if chunk in recent]
+
+        activations = compute_activations(time, decmem, chunk_tobe_matched, chunks, buffers, parameters)
+        best = activations.best(parameters['retrieval_threshold'])
+        if best is None:
+            retrieved = None
+            extra_time = utilities.retrieval_latency(parameters['retrieval_threshold'], parameters['latency_factor'], parameters['latency_exponent'])
+        else:
+            retrieved = activations.chunks[best]
+            buffer.activation = activations.total[best]
+            extra_time = utilities.retrieval_latency(buffer.activation, parameters['latency_factor'], parameters['latency_exponent'])
+        if buffer.finst:
+            buffer.recent.append(retrieved)
+            if buffer.finst < len(buffer.recent):
+                buffer.recent.popleft()
+        return retrieved, extra_time
+    batched_retrieve.batched = True
+    buffer.retrieve = batched_retrieve
+    return buffer
+
+
+## Models ##
+
+def _batch_simulation_retrievals(model:ACTRModel, simulation:Simulation):
+    for buffer in get_production_rules(simulation).buffers.values():
+        if isinstance(buffer, DecMemBuffer):
+            batch_retrievals(buffer)
+
+
+def install_activation_engine(model:ACTRModel) -> ACTRModel:
+    # the retrievals of every simulation of the model compute activations in batches (can be combined with `install_decmem_index`)
+    return add_simulation_hook(model, _batch_simulation_retrievals)
+
+
+def uninstall_activation_engine(model:ACTRModel) -> ACTRModel:
+    for buffer in model.retrievals.values():
+        if getattr(buffer.retrieve, 'batched', False):
+            del buffer.retrieve
+    return remove_simulation_hook(model, _batch_simulation_retrievals)
@@ -0,0 +1,256 @@
+"""
+Asyncio driver for many models that run at the same time, each with its own live environment (e.g., a connection to a task server): the simulations are stepped cooperatively in one event loop, their events are passed to the environments through bounded queues (backpressure), and the input of the environments is applied to the models between steps.
+"""
+
+from __future__ import annotations
+import asyncio
+from time import perf_counter
+from typing import Awaitable, Callable, Iterable, NamedTuple
+
+from pyactr import ACTRModel
+from pyactr.chunks import Chunk
+from pyactr.simulation import Simulation
+from simpy.core import EmptySchedule
+
+from pyactr_oo_syntax.base.rule_and_production import production
+from pyactr_oo_syntax.helpers.data_types import Buffer
+from pyactr_oo_syntax.runtime.hooks import get_production_rules, wake_procedural
+from pyactr_oo_syntax.runtime.trace import EventKind, TraceEvent, trace_simulation
+
+Input = Callable[[ACTRModel, Simulation], None]
+
+
+class LiveEnvironment:
+    # environment of one or more agents; all methods are coroutines, so an environment can wait for I/O without blocking the other agents
+
+    async def start(self, agent:Agent):
+        # before the first step, e.g., to send the first stimulus
+        pass
+
+    async def observe(self, agent:Agent, event:TraceEvent):
+        # every event of the kinds the agent passes on (by default key presses), in order; the agent goes on stepping meanwhile, until its queue is full
+        pass
+
+    async def idle(self, agent:Agent) -> bool:
+        # the simulation ran out of events and there is no input: True to wait for input (`agent.send`), False to finish the agent
+        return False
+
+    async def stop(self, agent:Agent):
+        pass
+
+
+class AgentMetrics(NamedTuple):
+    name: str
+    steps: int
+    events: int # passed to the environment
+    inputs: int # applied to the model
+    simulated_time: float
+    step_seconds: float # wall-clock time spent stepping the simulation
+    backpressure_seconds: float # wall-clock time spent waiting for room in the queue of events
+    input_seconds: float # wall-clock time spent waiting for input while the simulation was idle
+    max_queued: int
+
+    @property
+    def steps_per_second(self) -> float:
+        return self.steps / self.step_seconds if self.step_seconds else 0.
+
+
+class Agent:
+    # one model with its simulation and environment, created by `AsyncDriver.add`
+    def __init__(self, name:str, model:ACTRModel, environment:LiveEnvironment, max_time:float, kinds:Iterable[EventKind], buffers:Iterable[Buffer|str]|None, productions:Iterable[production]|None, queue_size:int, steps_per_slice:int, simulation_kwargs:dict):
+        self.name = name
+        self.model = model
+        self.environment = environment
+        self.max_time = max_time
+        self.simulation:Simulation|None = None
+        self.__kinds = set(kinds)
+        self.__buffers = buffers
+        self.__productions = productions
+        self.__steps_per_slice = steps_per_slice
+        self.__simulation_kwargs = simulation_kwargs
+        self.__events:asyncio.Queue[TraceEvent] = asyncio.Queue(maxsize=queue_size)
+        self.__inputs:asyncio.Queue[Input|None] = asyncio.Queue(maxsize=queue_size)
+        self.__observer:asyncio.Task|None = None
+        self.__closed = False
+
+        self.steps = self.events = self.inputs = self.max_queued = 0
+        self.step_seconds = self.backpressure_seconds = self.input_seconds = 0.
+
+    def metrics(self) -> AgentMetrics:
+        return AgentMetrics(
+            name=self.name,
+            steps=self.steps,
+            events=self.events,
+            inputs=self.inputs,
+            simulated_time=self.simulation.show_time() if self.simulation is not None else 0.,
+            step_seconds=self.step_seconds,
+            backpressure_seconds=self.backpressure_seconds,
+            input_seconds=self.input_seconds,
+            max_queued=self.max_queued
+        )
+
+    ## Input from the Environment ##
+
+    async def send(self, action:Input):
+        # the action is called with the model and its simulation between two steps, after which the procedural module tries to fire again; waits while the queue of inputs is full
+        await self.__inputs.put(action)
+
+    async def set_buffer(self, buffer:Buffer|str, chunk:Chunk):
+        # replaces the content of a buffer (e.g., the goal for the next trial)
+        name = buffer.value if isinstance(buffer, Buffer) else buffer
+        await self.send(lambda model, simulation: get_production_rules(simulation).buffers[name].add(chunk))
+
+    def close(self):
+        # the agent finishes after its current step (pending inputs are dropped)
+        self.__closed = True
+        if self.__inputs.empty():
+            self.__inputs.put_nowait(None)
+
+    @property
+    def closed(self) -> bool:
+        return self.__closed
+
+    ## Running ##
+
+    async def run(self) -> AgentMetrics:
+        pending:list[TraceEvent] = []
+        self.simulation = trace_simulation(self.model.simulation(trace=False, **self.__simulation_kwargs), pending.append, kinds=self.__kinds, buffers=self.__buffers, productions=self.__productions)
+        self.__observer = asyncio.create_task(self.__observe())
+        try:
+            await self.__guarded(self.environment.start(self))
+            while not self.__closed and self.simulation.show_time() <= self.max_time:
+                self.__apply_inputs()
+                idle = self.__step(self.__steps_per_slice)
+                for event in pending:
+                    if event.time <= self.max_time:
+                        await self.__put(event)
+                pending.clear()
+                if idle and not self.__closed:
+                    if not await self.__wait_for_input():
+                        break
+                else:
+                    await asyncio.sleep(0) # let other agents step
+            await self.__guarded(self.__events.join())
+        finally:
+            self.__observer.cancel()
+        await self.environment.stop(self)
+        return self.metrics()
+
+    def __step(self, count:int) -> bool:
+        # True if the simulation ran out of events
+        start = perf_counter()
+        try:
+            for _ in range(count):
+                self.simulation.step()
+                self.steps += 1
+                if self.simulation.show_time() > self.max_time:
+                    break
+        except EmptySchedule:
+            return True
+        finally:
+            self.step_seconds += perf_counter() - start
+        return False
+
+    def __apply_inputs(self):
+        applied = False
+        while not self.__inputs.empty():
+            action = self.__inputs.get_nowait()
+            if action is not None and not self.__closed:
+                action(self.model, self.simulation)
+                self.inputs += 1
+                applied = True
+        if applied:
+            wake_procedural(self.simulation)
+
+    async def __wait_for_input(self) -> bool:
+        # the environment may still answer events in the queue, so they are observed first
+        await self.__guarded(self.__events.join())
+        if self.__inputs.empty() and not await self.__guarded(self.environment.idle(self)):
+            return False
+        start = perf_counter()
+        action = await self.__guarded(self.__inputs.get())
+        self.input_seconds += perf_counter() - start
+        self.__inputs.put_nowait(action) # applied by the next slice, together with any other input
+        return not self.__closed
+
+    async def __put(self, event:TraceEvent):
+        if self.__events.full():
+            start = perf_counter()
+            await self.__guarded(self.__events.put(event))
+            self.backpressure_seconds += perf_counter() - start
+        else:
+            self.__events.put_nowait(event)
+        self.max_queued = max(self.max_queued, self.__events.qsize())
+
+    async def __observe(self):
+        while True:
+            event = await self.__events.get()
+            try:
+                await self.environment.observe(self, event)
+                self.events += 1
+            finally:
+                self.__events.task_done()
+
+    async def __guarded(self, awaitable:Awaitable):
+        # waits for the awaitable, unless observing events failed (the error of the environment is raised then)
+        task = asyncio.ensure_future(awaitable)
+        done, _ = await asyncio.wait({task, self.__observer}, return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            return task.result()
+        task.cancel()
+        self.__observer.result()
+        raise RuntimeError(f"Observing the events of agent '{self.name}' stopped.")
+
+    def __repr__(self) -> str:
+        return f"Agent({self.name!r}, steps={self.steps}, events={self.events}, inputs={self.inputs})"
+
+
+class AsyncDriver:
+    # runs many agents in one event loop, e.g., `metrics = asyncio.run(driver.run())`
+    def __init__(self, max_active:int|None=None, steps_per_slice:int=50, queue_size:int=64):
+        # max_active: number of agents that are stepped at the same time (the others wait to start); steps_per_slice: steps of one agent before the others get their turn; queue_size: events (and inputs) per agent that can wait for the environment
+        self.max_active = max_active
+        self.steps_per_slice = steps_per_slice
+        self.queue_size = queue_size
+        self.agents:list[Agent] = []
+
+    def add(self, model:ACTRModel, environment:LiveEnvironment|None=None, name:str|None=None, max_time:float=float('inf'), kinds:Iterable[EventKind]=(EventKind.KEY_PRESSED,), buffers:Iterable[Buffer|str]|None=None, productions:Iterable[production]|None=None, **simulation_kwargs) -> Agent:
+        # kinds / buffers / productions: events that are passed to the environment (see `trace_simulation`); simulation_kwargs are passed to `model.simulation`
+        agent = Agent(
+            name=name if name is not None else str(len(self.agents)),
+            model=model,
+            environment=environment or LiveEnvironment(),
+            max_time=max_time,
+            kinds=kinds,
+            buffers=buffers,
+            productions=productions,
+            queue_size=self.queue_size,
+            steps_per_slice=self.steps_per_slice,
+            simulation_kwargs=simulation_kwargs
+        )
+        self.agents.append(agent)
+        return agent
+
+    async def run(self) -> list[AgentMetrics]:
+        # agents that were added before; the first error (of a model or an environment) is raised
+        if self.max_active is None:
+            return list(await asyncio.gather(*(agent.run() for agent in self.agents)))
+        active = asyncio.Semaphore(self.max_active)
+        async def run_agent(agent:Agent) -> AgentMetrics:
+            async with active:
+                return await agent.run()
+        return list(await asyncio.gather(*(run_agent(agent) for agent in self.agents)))
+
+    def metrics(self) -> list[AgentMetrics]:
+        return [agent.metrics() for agent in self.agents]
+
+    def throughput(self, wall_seconds:float) -> dict[str, float]:
+        # totals over all agents for a run that took wall_seconds
+        metrics = self.metrics()
+        return {
+            'agents': len(metrics),
+            'steps_per_second': sum(agent.steps for agent in metrics) / wall_seconds if wall_seconds else 0.,
+            'events_per_second': sum(agent.events for agent in metrics) / wall_seconds if wall_seconds else 0.,
+            'simulated_seconds_per_second': sum(agent.simulated_time for agent in metrics) / wall_seconds if wall_seconds else 0.,
+            'backpressure_seconds': sum(agent.backpressure_seconds for agent in metrics)
+        }
@@ -0,0 +1,431 @@
+"""
+Declarative memory with a capacity for long simulations: once more chunks are stored (by `add_to_decmem`, the loaders, or cleared buffers), chunks are evicted by a policy (lowest base-level activation, least recently used, or oldest) until a lower bound is reached.
+Evicted chunks (with their presentation times) can be spilled to a `ChunkArchive`, a file that is read via mmap, and restored from there.
+"""
+
+from __future__ import annotations
+import mmap
+import os
+import pickle
+import shutil
+import struct
+from enum import Enum
+from time import perf_counter
+from typing import Callable, Iterator, NamedTuple
+
+import numpy as np
+from pyactr import ACTRModel, utilities
+from pyactr.chunks import Chunk
+from pyactr.declarative import DecMem, DecMemBuffer
+from pyactr.simulation import Simulation
+
+from pyactr_oo_syntax.runtime.activation import base_levels
+from pyactr_oo_syntax.runtime.decmem_index import IndexedDecMem
+from pyactr_oo_syntax.runtime.hooks import add_simulation_hook, get_production_rules, remove_simulation_hook
+
+_TIME_RESOLUTION = 0.0001 # pyactr rounds times to 4 decimals; base-level activations for eviction are taken this long after the latest presentation
+
+
+class EvictionPolicy(Enum):
+    BASE_LEVEL = 'base_level' # lowest base-level activation (incl. manually set activations) first
+    LRU = 'lru' # least recently retrieved or presented first
+    AGE = 'age' # longest in declarative memory first
+
+
+class EvictionStats(NamedTuple):
+    size: int
+    peak_size: int
+    runs: int # number of times chunks were evicted
+    evicted: int
+    archived: int
+    restored: int
+    eviction_seconds: float # wall-clock time spent choosing and removing chunks
+
+
+## Archive ##
+
+def _plain_value(value:object) -> tuple:
+    # pyactr's chunk types are created at runtime and cannot be pickled, so chunks are stored as (type name, slots) with nested values
+    if isinstance(value, Chunk):
+        return ('chunk', _plain_chunk(value))
+    if isinstance(value, utilities.VarvalClass):
+        return ('varval', tuple(map(_plain_value, value)))
+    return ('value', value)
+
+
+def _plain_chunk(chunk:Chunk) -> tuple:
+    return (chunk.typename, tuple((slot, _plain_value(value)) for slot, value in chunk))
+
+
+def _built_value(plain:tuple) -> object:
+    kind, value = plain
+    if kind == 'chunk':
+        return _built_chunk(value)
+    if kind == 'varval':
+        return utilities.VarvalClass(*map(_built_value, value))
+    return value
+
+
+def _built_chunk(plain:tuple) -> Chunk:
+    typename, slots = plain
+    return Chunk(typename, **{slot: _built_value(value) for slot, value in slots})
+
+
+class ArchivedChunk(NamedTuple):
+    chunk: Chunk
+    presentations: np.ndarray
+    activation: float|None # manually set activation
+    evicted_at: float
+
+
+class ChunkArchive:
+    # append-only file of evicted chunks; only the offsets of the records are kept in memory (by the hash of their chunk), the records are read via mmap
+    # restored records are marked in their header and skipped from then on (also when the archive is opened again), the file only shrinks by `clear`
+    _HEADER = struct.Struct('<I?') # length of the record, restored
+
+    def __init__(self, path:str|os.PathLike):
+        self.path = os.fspath(path)
+        self.__file = open(self.path, 'r+b' if os.path.exists(self.path) else 'w+b')
+        self.__map:mmap.mmap|None = None
+        self.__offsets:dict[int, list[int]] = {}
+        self.__length = 0
+        self.__index_records()
+
+    def __index_records(self):
+        # an existing archive is opened again (e.g., by the next run)
+        for offset, record in self.__records(restored=False):
+            self.__offsets.setdefault(hash(_built_chunk(record[0])), []).append(offset)
+            self.__length += 1
+
+    def __mapped(self) -> mmap.mmap|None:
+        self.__file.flush()
+        size = os.fstat(self.__file.fileno()).st_size
+        if size == 0:
+            return None
+        if self.__map is None or len(self.__map) < size:
+            if self.__map is not None:
+                self.__map.close()
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.__map
+
+    def __read(self, offset:int) -> tuple:
+        data = self.__mapped()
+        length, _ = self._HEADER.unpack_from(data, offset)
+        start = offset + self._HEADER.size
+        return pickle.loads(data[start:start + length])
+
+    def __records(self, restored:bool=True) -> Iterator[tuple[int, tuple]]:
+        data = self.__mapped()
+        offset = 0
+        while data is not None and offset < len(data):
+            length, is_restored = self._HEADER.unpack_from(data, offset)
+            start = offset + self._HEADER.size
+            if restored or not is_restored:
+                yield offset, pickle.loads(data[start:start + length])
+            offset = start + length
+
+    def __archived(self, record:tuple) -> ArchivedChunk:
+        plain, presentations, activation, evicted_at = record
+        return ArchivedChunk(_built_chunk(plain), np.array(presentations), activation, evicted_at)
+
+    def append(self, chunk:Chunk, presentations:np.ndarray, activation:float|None=None, evicted_at:float=0.):
+        payload = pickle.dumps((_plain_chunk(chunk), np.asarray(presentations).tolist(), activation, evicted_at), protocol=pickle.HIGHEST_PROTOCOL)
+        self.__file.seek(0, os.SEEK_END)
+        offset = self.__file.tell()
+        self.__file.write(self._HEADER.pack(len(payload), False))
+        self.__file.write(payload)
+        self.__offsets.setdefault(hash(chunk), []).append(offset)
+        self.__length += 1
+
+    def __find(self, chunk:Chunk) -> tuple[int, ArchivedChunk]|None:
+        for offset in reversed(self.__offsets.get(hash(chunk), [])):
+            archived = self.__archived(self.__read(offset))
+            if archived.chunk == chunk:
+                return offset, archived
+        return None
+
+    def get(self, chunk:Chunk) -> ArchivedChunk|None:
+        found = self.__find(chunk)
+        return found[1] if found is not None else None
+
+    def pop(self, chunk:Chunk) -> ArchivedChunk|None:
+        # the most recent record of the chunk is taken out of the archive
+        found = self.__find(chunk)
+        if found is None:
+            return None
+        offset, archived = found
+        self.__file.seek(offset + self._HEADER.size - 1)
+        self.__file.write(b'\x01')
+        offsets = self.__offsets[hash(chunk)]
+        offsets.remove(offset)
+        if not offsets:
+            del self.__offsets[hash(chunk)]
+        self.__length -= 1
+        return archived
+
+    def __contains__(self, chunk:Chunk) -> bool:
+        return self.__find(chunk) is not None
+
+    def __iter__(self) -> Iterator[ArchivedChunk]:
+        # records that have not been restored, in the order of eviction
+        for _, record in self.__records(restored=False):
+            yield self.__archived(record)
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def copy(self, path:str|os.PathLike) -> ChunkArchive:
+        # a new archive at path with the same records (e.g., for a copy of a declarative memory that must not restore the chunks of the original)
+        self.__file.flush()
+        shutil.copyfile(self.path, path)
+        return ChunkArchive(path)
+
+    def clear(self):
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        self.__file.truncate(0)
+        self.__offsets.clear()
+        self.__length = 0
+
+    def close(self):
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        self.__file.close()
+
+    def __enter__(self) -> ChunkArchive:
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"ChunkArchive({self.path!r}, chunks={self.__length})"
+
+
+## Declarative Memory ##
+
+class BoundedDecMem(IndexedDecMem):
+    # indexed declarative memory (see `IndexedDecMem`) that holds at most capacity chunks; when a new chunk exceeds it, chunks are evicted until evict_to chunks are left (in batches, so the cost of choosing them is shared)
+    # the chunk that is being added is never evicted; capacity None: unbounded
+    def __init__(self, data=None, capacity:int|None=None, policy:EvictionPolicy=EvictionPolicy.BASE_LEVEL, evict_to:int|None=None, archive:ChunkArchive|None=None, decay:float=0.5, optimized_learning:bool=False):
+        # decay / optimized_learning: for base-level activations of the policy BASE_LEVEL (usually the model's parameters)
+        if capacity is not None and capacity < 1:
+            raise ValueError(f"The capacity has to be at least 1, not {capacity}.")
+        self.capacity = capacity
+        self.policy = policy
+        self.evict_to = evict_to
+        self.archive = archive
+        self.decay = decay
+        self.optimized_learning = optimized_learning
+        self.__last_used:dict[Chunk, None] = {} # least recently used first
+        self.__time = 0.
+        self.__paused = False
+        self.__peak_size = self.__runs = self.__evicted = self.__archived = self.__restored = 0
+        self.__eviction_seconds = 0.
+        super().__init__(data)
+
+    @classmethod
+    def from_decmem(cls, decmem:DecMem, **options) -> BoundedDecMem:
+        # options: see __init__; chunks beyond the capacity are evicted once all chunks are added
+        bounded = cls(**options)
+        bounded.__paused = True
+        for chunk, times in decmem._data.items():
+            bounded[chunk] = times
+        bounded.activations = dict(decmem.activations)
+        bounded.restricted_number_chunks = decmem.restricted_number_chunks.copy()
+        bounded.unrestricted_number_chunks = decmem.unrestricted_number_chunks.copy()
+        if isinstance(decmem, BoundedDecMem):
+            # the order of use (for the policy LRU) and the latest retrieval carry over
+            bounded.__last_used = dict.fromkeys(chunk for chunk in decmem.__last_used if chunk in bounded._data)
+            bounded.__time = max(bounded.__time, decmem.__time)
+        bounded.__paused = False
+        bounded.evict()
+        return bounded
+
+    def copy(self, archive:ChunkArchive|None=None) -> BoundedDecMem:
+        # the archive is not shared by the copy (archive: one for the copy, e.g., `self.archive.copy(path)`)
+        return BoundedDecMem.from_decmem(self, capacity=self.capacity, policy=self.policy, evict_to=self.evict_to, archive=archive, decay=self.decay, optimized_learning=self.optimized_learning)
+
+    @property
+    def time(self) -> float:
+        # latest presentation or retrieval
+        return self.__time
+
+    def __setitem__(self, key, time):
+        super().__setitem__(key, time)
+        presentations = self._data[key]
+        if len(presentations):
+            self.__time = max(self.__time, float(np.max(presentations)))
+        self.__last_used.pop(key, None)
+        self.__last_used[key] = None
+        self.__peak_size = max(self.__peak_size, len(self))
+        if not self.__paused and self.capacity is not None and len(self) > self.capacity:
+            self.evict(keep=key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.__last_used.pop(key, None)
+        self.activations.pop(key, None)
+        # fan counters for spreading activation: an entry is 1 + the number of slots (in a slot) with the value, counted up by pyactr for every slot of a new chunk (if the entry exists)
+        # the slots of the removed chunk are counted down the same way; entries of values that no chunk holds anymore are dropped, like in a declarative memory that never had these chunks (pyactr counts them again when needed)
+        if not self.unrestricted_number_chunks and not self.restricted_number_chunks:
+            return
+        for slot, value in key:
+            value = utilities.splitting(value).values
+            if not value:
+                continue
+            for counter, counter_key in ((self.unrestricted_number_chunks, value), (self.restricted_number_chunks, (slot, value))):
+                if counter_key in counter:
+                    counter[counter_key] -= 1
+                    if counter[counter_key] <= 1:
+                        del counter[counter_key]
+
+    def touch(self, chunk:Chunk|None, time:float):
+        # a retrieval of the chunk (for the policy LRU)
+        if chunk is not None and chunk in self._data:
+            self.__time = max(self.__time, time)
+            self.__last_used.pop(chunk, None)
+            self.__last_used[chunk] = None
+
+    ## Eviction ##
+
+    def __victims(self, count:int, keep:Chunk|None) -> list[Chunk]:
+        if self.policy == EvictionPolicy.LRU:
+            order = iter(self.__last_used)
+        elif self.policy == EvictionPolicy.AGE:
+            order = iter(self._data)
+        else:
+            chunks = [chunk for chunk in self._data if chunk is not keep]
+            values, valid = base_levels(self.__time + _TIME_RESOLUTION, self, chunks, True, self.decay, self.optimized_learning)
+            values[~valid] = -np.inf
+            lowest = np.argpartition(values, count - 1)[:count] if count < len(chunks) else np.arange(len(chunks))
+            return [chunks[index] for index in lowest[np.argsort(values[lowest], kind='stable')]]
+        victims = []
+        for chunk in order:
+            if len(victims) == count:
+                break
+            if chunk is not keep:
+                victims.append(chunk)
+        return victims
+
+    def evict(self, count:int|None=None, keep:Chunk|None=None) -> list[Chunk]:
+        # count: number of chunks to evict (default: down to evict_to, if the capacity is exceeded); the evicted chunks are returned (and archived)
+        if count is None:
+            if self.capacity is None or len(self) <= self.capacity:
+                return []
+            evict_to = self.evict_to if self.evict_to is not None else self.capacity - max(1, self.capacity // 10)
+            count = len(self) - min(evict_to, self.capacity)
+        count = min(count, len(self) - (keep is not None and keep in self._data))
+        if count <= 0:
+            return []
+        start = perf_counter()
+        victims = self.__victims(count, keep)
+        for chunk in victims:
+            if self.archive is not None:
+                self.archive.append(chunk, self._data[chunk], self.activations.get(chunk), self.__time)
+                self.__archived += 1
+            del self[chunk]
+        self.__runs += 1
+        self.__evicted += len(victims)
+        self.__eviction_seconds += perf_counter() - start
+        return victims
+
+    def restore(self, chunk:Chunk) -> bool:
+        # moves the chunk (with its presentations and manually set activation) from the archive back into declarative memory; False if it is not archived
+        archived = self.archive.pop(chunk) if self.archive is not None else None
+        if archived is None:
+            return False
+        presentations = archived.presentations
+        if chunk in self._data:
+            presentations = np.sort(np.concatenate((presentations, self._data[chunk])))
+        self[archived.chunk] = presentations
+        if archived.activation is not None:
+            self.activations[archived.chunk] = archived.activation
+        self.__restored += 1
+        return True
+
+    def restore_matching(self, predicate:Callable[[ArchivedChunk], bool], limit:int|None=None) -> int:
+        # restores the archived chunks for which predicate is true (e.g., `lambda archived: archived.chunk.typename == 'fact'`), at most limit; returns their number
+        if self.archive is None:
+            return 0
+        matching = [archived.chunk for archived in self.archive if predicate(archived)]
+        return sum(self.restore(chunk) for chunk in matching[:limit])
+
+    def stats(self) -> EvictionStats:
+        return EvictionStats(
+            size=len(self),
+            peak_size=self.__peak_size,
+            runs=self.__runs,
+            evicted=self.__evicted,
+            archived=self.__archived,
+            restored=self.__restored,
+            eviction_seconds=self.__eviction_seconds
+        )
+
+
+## Models ##
+
+def track_retrievals(buffer:DecMemBuffer) -> DecMemBuffer:
+    # `retrieve` is wrapped on this buffer instance only (once); retrieved chunks count as used by the buffer's bounded declarative memory
+    if getattr(buffer.retrieve, 'tracked', False):
+        return buffer
+    retrieve = buffer.retrieve
+    def tracked_retrieve(time, otherchunk, actrvariables, buffers, extra_tests, model_parameters):
+        retrieved, extra_time = retrieve(time, otherchunk, actrvariables, buffers, extra_tests, model_parameters)
+        if isinstance(buffer.dm, BoundedDecMem):
+            buffer.dm.touch(retrieved, time)
+        return retrieved, extra_time
+    tracked_retrieve.tracked = True
+    buffer.retrieve = tracked_retrieve
+    return buffer
+
+
+def _track_simulation_retrievals(model:ACTRModel, simulation:Simulation):
+    for buffer in get_production_rules(simulation).buffers.values():
+        if isinstance(buffer, DecMemBuffer) and isinstance(buffer.dm, BoundedDecMem):
+            track_retrievals(buffer)
+
+
+def install_bounded_decmem(model:ACTRModel, capacity:int, policy:EvictionPolicy=EvictionPolicy.BASE_LEVEL, evict_to:int|None=None, archive:ChunkArchive|str|os.PathLike|None=None) -> ACTRModel:
+    # replaces the model's declarative memories by bounded ones (chunks beyond the capacity are evicted right away) and tracks the retrievals of its simulations
+    # archive: a path is opened as a `ChunkArchive` (with the suffix `.<name>` for every declarative memory but the first)
+    decay = model.model_parameters['decay']
+    for position, (name, decmem) in enumerate(list(model.decmems.items())):
+        if isinstance(archive, (str, os.PathLike)):
+            decmem_archive = ChunkArchive(os.fspath(archive) + (f".{name}" if position else ''))
+        else:
+            decmem_archive = archive if position == 0 else None
+        if isinstance(decmem, BoundedDecMem):
+            decmem.capacity, decmem.policy, decmem.evict_to, decmem.archive = capacity, policy, evict_to, decmem_archive
+            decmem.evict()
+            continue
+        bounded = model.decmems[name] = BoundedDecMem.from_decmem(
+            decmem,
+            capacity=capacity,
+            policy=policy,
+            evict_to=evict_to,
+            archive=decmem_archive,
+            decay=decay if decay is not None else 0.5,
+            optimized_learning=model.model_parameters['optimized_learning']
+        )
+        for buffer in (*model.goals.values(), *model.retrievals.values(), *model.visbuffers.values()):
+            if buffer.dm is decmem:
+                buffer.dm = bounded
+    return add_simulation_hook(model, _track_simulation_retrievals)
+
+
+def uninstall_bounded_decmem(model:ACTRModel) -> ACTRModel:
+    # the declarative memories stay (indexed, with their archives), but are unbounded from now on
+    for decmem in model.decmems.values():
+        if isinstance(decmem, BoundedDecMem):
+            decmem.capacity = None
+    for buffer in model.retrievals.values():
+        if getattr(buffer.retrieve, 'tracked', False):
+            del buffer.retrieve
+    return remove_simulation_hook(model, _track_simulation_retrievals)
+
+
+def get_eviction_stats(model:ACTRModel) -> dict[str, EvictionStats]:
+    return {name: decmem.stats() for name, decmem in model.decmems.items() if isinstance(decmem, BoundedDecMem)}
@@ -0,0 +1,139 @@
+"""
+Discrimination index for pyactr's conflict resolution: productions are indexed by one of their constant slot tests (e.g., `=g> phase start`), so that every cycle only tests the productions that can match the current buffer contents instead of all productions.
+"""
+
+from __future__ import annotations
+import bisect
+import heapq
+from collections import defaultdict
+from typing import Iterable, Iterator
+
+from pyactr import ACTRModel
+from pyactr.chunks import Chunk
+from pyactr.simulation import Simulation
+from pyactr.utilities import VarvalClass
+
+from pyactr_oo_syntax.base.compilation import _VISION_SYMBOLS, CompiledChunk, CompiledProduction, get_compiled_productions
+from pyactr_oo_syntax.runtime.hooks import add_simulation_hook, get_production_rules, remove_simulation_hook
+
+
+def constant_tests(compiled:CompiledProduction) -> list[tuple[str, str, str]]:
+    # (buffer, slot, value) of all tests of the LHS that only match a buffer chunk with exactly this (string) value; 'None' tests for an empty slot, which pyactr does not store as a string, so it is not indexed (like in `decmem_index.slot_values`)
+    tests = []
+    lhs = {rule.key: rule for rule in compiled.lhs} # as in pyactr, the last rule for the same buffer wins
+    for key, rule in lhs.items():
+        if not key.startswith('=') or not isinstance(rule.content, CompiledChunk):
+            continue
+        for slot, value in rule.content.slots:
+            if value.variables is None and not value.negvalues and not value.negvariables and isinstance(value.values, str) and value.values and value.values != 'None' and value.values[0] not in _VISION_SYMBOLS and not (value.lookup and value.values in Chunk._chunks):
+                tests.append((key[1:], slot, value.values))
+    return tests
+
+
+class ConflictIndex:
+    # replaces `ordered_rulenames` of pyactr's ProductionRules, which is only iterated (once per conflict resolution) and appended to (by production compilation); iteration yields the candidates in the original (utility) order
+    def __init__(self, ordered_rulenames:Iterable[str], compiled:dict[str, CompiledProduction], buffers:dict):
+        self.__rulenames:list[str] = list(ordered_rulenames)
+        self.__buffers = buffers
+        self.__rank:dict[str, float] = {name: rank for rank, name in enumerate(self.__rulenames)}
+        self.__unindexed:list[str] = []
+        self.__index:dict[tuple[str, str], dict[str, list[str]]] = {}
+        self.__lists:dict[str, list[str]] = {} # the candidate list of each production
+
+        tests_per_rule = {name: constant_tests(compiled[name]) for name in self.__rulenames if name in compiled}
+        self.__distinct_values:defaultdict[tuple[str, str], set[str]] = defaultdict(set)
+        for tests in tests_per_rule.values():
+            for buffer_name, slot, value in tests:
+                self.__distinct_values[(buffer_name, slot)].add(value)
+
+        for name in self.__rulenames:
+            self.__index_rule(name, tests_per_rule.get(name))
+
+    def __index_rule(self, name:str, tests:list[tuple[str, str, str]]|None):
+        if not tests:
+            rules = self.__unindexed
+        else:
+            # the test on the (buffer, slot) with the most distinct values discriminates best
+            buffer_name, slot, value = max(tests, key=lambda test: len(self.__distinct_values[test[:2]]))
+            rules = self.__index.setdefault((buffer_name, slot), {}).setdefault(value, [])
+        # candidate lists are kept in the order of the ranks (for merging)
+        if rules and self.__rank[rules[-1]] > self.__rank[name]:
+            bisect.insort(rules, name, key=self.__rank.__getitem__)
+        else:
+            rules.append(name)
+        self.__lists[name] = rules
+
+    def append(self, name:str):
+        # productions created during the simulation (production compilation) are always tested
+        self.__rank[name] = self.__rank[self.__rulenames[-1]] + 1 if self.__rulenames else 0
+        self.__rulenames.append(name)
+        self.__index_rule(name, None)
+
+    def insert(self, position:int, name:str, compiled:CompiledProduction|None=None):
+        # a production added to a running simulation, tested at `position` of the order (compiled: indexed by its constant tests, otherwise always tested)
+        position = max(0, min(position, len(self.__rulenames)))
+        before = self.__rank[self.__rulenames[position - 1]] if position > 0 else None
+        after = self.__rank[self.__rulenames[position]] if position < len(self.__rulenames) else None
+        if before is None or after is None:
+            rank = (after - 1 if after is not None else 0) if before is None else before + 1
+        else:
+            rank = (before + after) / 2
+            if not before < rank < after: # floats are exhausted between the neighbors
+                self.__rank.update((existing, index) for index, existing in enumerate(self.__rulenames))
+                rank = position - 0.5
+        self.__rank[name] = rank
+        self.__rulenames.insert(position, name)
+        tests = constant_tests(compiled) if compiled is not None else None
+        for buffer_name, slot, value in tests or ():
+            self.__distinct_values[(buffer_name, slot)].add(value)
+        self.__index_rule(name, tests)
+
+    def remove(self, name:str):
+        self.__rulenames.remove(name)
+        self.__lists.pop(name).remove(name)
+        del self.__rank[name]
+
+    def index(self, name:str) -> int:
+        return self.__rulenames.index(name)
+
+    def __len__(self) -> int:
+        return len(self.__rulenames)
+
+    def all_rulenames(self) -> list[str]:
+        return list(self.__rulenames)
+
+    def candidates(self) -> list[list[str]]:
+        candidates = [self.__unindexed]
+        for (buffer_name, slot), rules_per_value in self.__index.items():
+            buffer = self.__buffers.get(buffer_name)
+            if not buffer:
+                continue # tests of empty (or missing) buffers fail
+            value = getattr(next(iter(buffer)).actrchunk, slot + '_', None)
+            if isinstance(value, VarvalClass):
+                value = value.values
+            if isinstance(value, Chunk):
+                return [self.__rulenames] # chunks as values are compared by their content, so all productions are tested
+            if isinstance(value, str) and value in rules_per_value:
+                candidates.append(rules_per_value[value])
+        return candidates
+
+    def __iter__(self) -> Iterator[str]:
+        candidates = self.candidates()
+        if len(candidates) == 1:
+            return iter(candidates[0])
+        return heapq.merge(*candidates, key=self.__rank.__getitem__)
+
+
+def index_conflict_set(model:ACTRModel, simulation:Simulation):
+    production_rules = get_production_rules(simulation)
+    production_rules.ordered_rulenames = ConflictIndex(production_rules.ordered_rulenames, get_compiled_productions(model), production_rules.buffers)
+
+
+def install_conflict_index(model:ACTRModel) -> ACTRModel:
+    # productions that were not added in compiled form (e.g., via `model.productionstring`) are tested in every cycle
+    # note: with utility noise, fewer noise values are drawn per cycle, so the random sequence (not the distribution) of selections changes
+    return add_simulation_hook(model, index_conflict_set)
+
+
+def uninstall_conflict_index(model:ACTRModel) -> ACTRModel:
+    return remove_simulation_hook(model, index_conflict_set)
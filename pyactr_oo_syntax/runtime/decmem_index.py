@@ -0,0 +1,162 @@
+"""
+Inverted index for declarative memory: chunks are indexed by their (slot, value) pairs, so that retrieval requests with constant slot values (e.g., `+retrieval> isa fact key k42`) only test the chunks that have all these values instead of scanning the whole declarative memory.
+"""
+
+from __future__ import annotations
+from collections.abc import MutableMapping
+from typing import Iterable, Iterator
+
+from pyactr import ACTRModel, utilities
+from pyactr.chunks import Chunk
+from pyactr.declarative import DecMem, DecMemBuffer
+from pyactr.simulation import Simulation
+
+from pyactr_oo_syntax.runtime.hooks import add_simulation_hook, get_production_rules, remove_simulation_hook
+
+
+def slot_values(chunk:Chunk) -> Iterator[tuple[str, str]]:
+    # the (slot, value) pairs of a chunk that a constant value in a request can match (chunks as values are compared by their content, so they are not indexed)
+    for slot, value in chunk:
+        if isinstance(value, utilities.VarvalClass):
+            value = value.values
+        if isinstance(value, str) and value and value != 'None':
+            yield slot, value
+
+
+class IndexedDecMem(DecMem):
+    # every chunk that is stored (by this package's loaders, pyactr's `add`, or cleared buffers) goes through __setitem__, so the index is always complete
+    # note: like pyactr's matching, the index ignores the chunk type (`isa` only restricts the slots a request has)
+    def __init__(self, data=None):
+        self.__index:dict[tuple[str, str], set[Chunk]] = {}
+        self.__rank:dict[Chunk, int] = {} # insertion order, in which pyactr iterates declarative memory
+        self.__next_rank:int = 0
+        super().__init__(data)
+
+    @classmethod
+    def from_decmem(cls, decmem:DecMem) -> IndexedDecMem:
+        indexed = cls()
+        for chunk, times in decmem._data.items():
+            indexed[chunk] = times
+        indexed.activations = dict(decmem.activations)
+        indexed.restricted_number_chunks = decmem.restricted_number_chunks.copy()
+        indexed.unrestricted_number_chunks = decmem.unrestricted_number_chunks.copy()
+        return indexed
+
+    def __setitem__(self, key, time):
+        is_new = key not in self._data
+        super().__setitem__(key, time)
+        if is_new:
+            self.__rank[key] = self.__next_rank
+            self.__next_rank += 1
+            for slot_value in slot_values(key):
+                self.__index.setdefault(slot_value, set()).add(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        del self.__rank[key]
+        for slot_value in slot_values(key):
+            chunks = self.__index[slot_value]
+            chunks.discard(key)
+            if not chunks:
+                del self.__index[slot_value]
+
+    def candidates(self, constraints:Iterable[tuple[str, str]]) -> list[Chunk]|None:
+        # chunks that have all (slot, value) pairs, in the order of declarative memory; None if there is no constraint (all chunks are candidates)
+        sets = sorted((self.__index.get(constraint, set()) for constraint in constraints), key=len)
+        if not sets:
+            return None
+        smallest, others = sets[0], sets[1:]
+        return sorted((chunk for chunk in smallest if all(chunk in chunks for chunks in others)), key=self.__rank.__getitem__)
+
+    def copy(self) -> IndexedDecMem:
+        return IndexedDecMem.from_decmem(self)
+
+
+class _CandidateView(MutableMapping):
+    # declarative memory as seen by one retrieval: iteration only yields the candidates, everything else is taken from the full declarative memory
+    def __init__(self, decmem:IndexedDecMem, candidates:list[Chunk]):
+        self.__decmem = decmem
+        self.__candidates = candidates
+
+    def __getattr__(self, name:str):
+        return getattr(self.__decmem, name)
+
+    def __getitem__(self, key):
+        return self.__decmem[key]
+
+    def __setitem__(self, key, value):
+        self.__decmem[key] = value
+
+    def __delitem__(self, key):
+        del self.__decmem[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self.__decmem
+
+    def __iter__(self) -> Iterator[Chunk]:
+        return iter(self.__candidates)
+
+    def __len__(self) -> int:
+        return len(self.__decmem)
+
+
+def request_constraints(otherchunk:Chunk, actrvariables:dict|None) -> list[tuple[str, str]]|None:
+    # constant slot values of a retrieval request after binding its variables (as in `DecMemBuffer.retrieve`); None if the request cannot be bound (pyactr reports the error)
+    try:
+        bound = {slot: utilities.check_bound_vars(actrvariables or {}, value, negative_impossible=False) for slot, value in otherchunk.removeunused()}
+    except utilities.ACTRError:
+        return None
+    return list(slot_values(Chunk(otherchunk.typename, **bound)))
+
+
+def index_retrievals(buffer:DecMemBuffer) -> DecMemBuffer:
+    # `retrieve` is wrapped on this buffer instance only (once); requests with constant values only test the candidates from the index of the buffer's declarative memory
+    # partial matching and spreading activation need all chunks (mismatching chunks can be retrieved, fan is counted over all chunks), so they always scan
+    if getattr(buffer.retrieve, 'indexed', False):
+        return buffer
+    retrieve = buffer.retrieve
+    def indexed_retrieve(time, otherchunk, actrvariables, buffers, extra_tests, model_parameters):
+        decmem = buffer.dm
+        parameters = {**model_parameters, **buffer.model_parameters}
+        if not isinstance(decmem, IndexedDecMem) or parameters['partial_matching'] or (parameters['subsymbolic'] and parameters['buffer_spreading_activation']):
+            return retrieve(time, otherchunk, actrvariables, buffers, extra_tests, model_parameters)
+        constraints = request_constraints(otherchunk, actrvariables)
+        candidates = decmem.candidates(constraints) if constraints else None
+        if candidates is None:
+            return retrieve(time, otherchunk, actrvariables, buffers, extra_tests, model_parameters)
+        buffer.dm = _CandidateView(decmem, candidates)
+        try:
+            return retrieve(time, otherchunk, actrvariables, buffers, extra_tests, model_parameters)
+        finally:
+            buffer.dm = decmem
+    indexed_retrieve.indexed = True
+    buffer.retrieve = indexed_retrieve
+    return buffer
+
+
+## Models ##
+
+def _index_simulation_retrievals(model:ACTRModel, simulation:Simulation):
+    for buffer in get_production_rules(simulation).buffers.values():
+        if isinstance(buffer, DecMemBuffer) and isinstance(buffer.dm, IndexedDecMem):
+            index_retrievals(buffer)
+
+
+def install_decmem_index(model:ACTRModel) -> ACTRModel:
+    # replaces the model's declarative memories by indexed ones (existing chunks are indexed once) and indexes the retrievals of its simulations
+    for name, decmem in list(model.decmems.items()):
+        if isinstance(decmem, IndexedDecMem):
+            continue
+        indexed = model.decmems[name] = IndexedDecMem.from_decmem(decmem)
+        for buffer in (*model.goals.values(), *model.retrievals.values(), *model.visbuffers.values()):
+            if buffer.dm is decmem:
+                buffer.dm = indexed
+    return add_simulation_hook(model, _index_simulation_retrievals)
+
+
+def uninstall_decmem_index(model:ACTRModel) -> ACTRModel:
+    # the declarative memories stay indexed (which is harmless), but retrievals scan them again
+    for buffer in model.retrievals.values():
+        if getattr(buffer.retrieve, 'indexed', False):
+            del buffer.retrieve
+    return remove_simulation_hook(model, _index_simulation_retrievals)
@@ -0,0 +1,83 @@
+"""
+Hooks into pyactr models and running simulations (pyactr itself only prints events or keeps the most recent one).
+"""
+
+from __future__ import annotations
+from typing import Callable
+from weakref import WeakKeyDictionary
+
+from pyactr import ACTRModel, utilities
+from pyactr.productions import ProductionRules
+from pyactr.simulation import Event, Simulation
+
+
+## Simulations of a Model ##
+
+_simulation_hooks:WeakKeyDictionary[ACTRModel, list[Callable[[ACTRModel, Simulation], None]]] = WeakKeyDictionary()
+
+def add_simulation_hook(model:ACTRModel, hook:Callable[[ACTRModel, Simulation], None]) -> ACTRModel:
+    # `model.simulation` is wrapped on this model instance only (once), every hook is called with the model and each new simulation
+    hooks = _simulation_hooks.get(model)
+    if hooks is None:
+        hooks = _simulation_hooks[model] = []
+        create_simulation = model.simulation
+        def simulation(*args, **kwargs) -> Simulation:
+            new_simulation = create_simulation(*args, **kwargs)
+            for simulation_hook in list(hooks):
+                simulation_hook(model, new_simulation)
+            return new_simulation
+        model.simulation = simulation
+    if hook not in hooks:
+        hooks.append(hook)
+    return model
+
+
+def remove_simulation_hook(model:ACTRModel, hook:Callable[[ACTRModel, Simulation], None]) -> ACTRModel:
+    hooks = _simulation_hooks.get(model, [])
+    if hook in hooks:
+        hooks.remove(hook)
+    return model
+
+
+_fork_installers:dict[Callable[[ACTRModel, Simulation], None], Callable[[ACTRModel], object]] = {}
+
+def set_fork_installer(hook:Callable[[ACTRModel, Simulation], None], install:Callable[[ACTRModel], object]):
+    # hooks with state per model (e.g., the profile of the profiler) are not copied to a new copy of a model (e.g., a fork of a snapshot), install is called with the copy instead
+    _fork_installers[hook] = install
+
+
+def copy_simulation_hooks(model:ACTRModel, hooks:list[Callable[[ACTRModel, Simulation], None]]) -> ACTRModel:
+    # the hooks of another model, for a copy of it
+    for hook in hooks:
+        install = _fork_installers.get(hook)
+        if install is not None:
+            install(model)
+        else:
+            add_simulation_hook(model, hook)
+    return model
+
+
+def get_production_rules(simulation:Simulation) -> ProductionRules:
+    # the procedural module of a simulation (conflict resolution, firing) is private in pyactr
+    return simulation._Simulation__pr
+
+
+def wake_procedural(simulation:Simulation) -> Simulation:
+    # after buffers were changed from outside (e.g., a new goal chunk), the procedural module waits for an event of another module before it tries again; this triggers its conflict resolution (also after the simulation ran out of events)
+    activate = simulation._Simulation__proc_activate
+    if not activate.triggered:
+        activate.succeed()
+    return simulation
+
+
+## Events of a Simulation ##
+
+def add_event_listener(simulation:Simulation, listener:Callable[[Event], None]) -> Simulation:
+    # every event of the modules (not the environment) passes through `__printevent__`, which is wrapped on this simulation instance only
+    print_event = simulation.__printevent__
+    def __printevent__(event:Event):
+        print_event(event)
+        if event.action != utilities._UNKNOWN:
+            listener(event)
+    simulation.__printevent__ = __printevent__
+    return simulation
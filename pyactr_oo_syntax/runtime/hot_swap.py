@@ -0,0 +1,112 @@
+"""
+Incremental changes of the productions of a model that is already populated (e.g., by `production_sequence.add_to_model`): productions are added, removed, or replaced by name, updating only the entries of the model and, for a running simulation, its order of conflict resolution (incl. the conflict index), without rebuilding the model.
+"""
+
+from __future__ import annotations
+
+from pyactr import ACTRModel
+from pyactr.simulation import Simulation
+
+from pyactr_oo_syntax.base.compilation import _compiled_productions, add_compiled_production
+from pyactr_oo_syntax.base.rule_and_production import production
+from pyactr_oo_syntax.runtime.conflict_index import ConflictIndex
+from pyactr_oo_syntax.runtime.hooks import get_production_rules
+
+
+def _name_of(prod:production|str) -> str:
+    name = prod if isinstance(prod, str) else prod.get_name()
+    if not name:
+        raise ValueError("Productions can only be changed by name, use `set_name` first.")
+    return name
+
+
+def _conflict_position(model:ACTRModel, ordered_rulenames, utility:float) -> int:
+    # pyactr orders productions by their utility (descending) when a simulation starts, a new production is tested after all productions with at least its utility
+    names = ordered_rulenames.all_rulenames() if isinstance(ordered_rulenames, ConflictIndex) else ordered_rulenames
+    for position, name in enumerate(names):
+        if model.productions[name]['utility'] < utility:
+            return position
+    return len(names)
+
+
+def _insert_into_simulation(simulation:Simulation, name:str, position:int, compiled=None):
+    ordered_rulenames = get_production_rules(simulation).ordered_rulenames
+    if isinstance(ordered_rulenames, ConflictIndex):
+        ordered_rulenames.insert(position, name, compiled)
+    else:
+        ordered_rulenames.insert(position, name)
+
+
+def _remove_from_simulation(simulation:Simulation, name:str) -> int:
+    # position the production had in the order of conflict resolution
+    production_rules = get_production_rules(simulation)
+    ordered_rulenames = production_rules.ordered_rulenames
+    position = ordered_rulenames.index(name)
+    ordered_rulenames.remove(name)
+    # utility learning and production compilation must not refer to the production any more
+    production_rules.rules.used_rulenames.pop(name, None)
+    if production_rules.last_rule == name:
+        production_rules.last_rule = None
+    if name in production_rules.compile[:2]:
+        production_rules.compile = []
+    return position
+
+
+def _check_not_firing(simulation:Simulation, name:str):
+    # pyactr looks up the selected production again when it fires it, so it is left alone from its selection until its actions have been carried out (usually only a step or two)
+    production_rules = get_production_rules(simulation)
+    if production_rules._PROCEDURAL in production_rules.procs and production_rules.used_rulename == name:
+        raise ValueError(f"The production '{name}' is being fired and cannot be removed or replaced before the simulation's next step.")
+
+
+def add_production(model:ACTRModel, prod:production, simulation:Simulation|None=None) -> production:
+    # simulation: a running simulation of the model, in which the production is tested from the next conflict resolution on (new simulations get it anyway)
+    name = _name_of(prod)
+    if name in model.productions:
+        raise ValueError(f"The model already has a production named '{name}', use `replace_production`.")
+    compiled = prod.compile()
+    add_compiled_production(model, compiled)
+    if simulation is not None:
+        ordered_rulenames = get_production_rules(simulation).ordered_rulenames
+        _insert_into_simulation(simulation, name, _conflict_position(model, ordered_rulenames, compiled.utility), compiled)
+    return prod
+
+
+def remove_production(model:ACTRModel, prod:production|str, simulation:Simulation|None=None) -> dict:
+    # returns the removed entry of the model (rule, utility incl. learned changes, reward)
+    name = _name_of(prod)
+    if name not in model.productions:
+        raise ValueError(f"The model has no production named '{name}'.")
+    if simulation is not None:
+        _check_not_firing(simulation, name)
+        _remove_from_simulation(simulation, name)
+    entry = dict(model.productions[name])
+    del model.productions[name]
+    _compiled_productions.get(model, {}).pop(name, None)
+    return entry
+
+
+def replace_production(model:ACTRModel, prod:production, name:str|None=None, simulation:Simulation|None=None, keep_utility:bool=False) -> production:
+    # name: of the production to replace (default: the name of prod); the new production takes its place in the order of conflict resolution of a running simulation
+    # keep_utility: the replaced production's current (possibly learned) utility is kept instead of the utility of prod
+    old_name = name or _name_of(prod)
+    new_name = _name_of(prod)
+    if old_name not in model.productions:
+        raise ValueError(f"The model has no production named '{old_name}'.")
+    if new_name != old_name and new_name in model.productions:
+        raise ValueError(f"The model already has a production named '{new_name}'.")
+    if simulation is not None:
+        _check_not_firing(simulation, old_name)
+    utility = model.productions[old_name]['utility']
+
+    position = _remove_from_simulation(simulation, old_name) if simulation is not None else None
+    if new_name != old_name:
+        del model.productions[old_name]
+        _compiled_productions.get(model, {}).pop(old_name, None)
+    compiled = prod.compile()
+    entry = add_compiled_production(model, compiled)
+    if keep_utility:
+        entry['utility'] = utility
+    if position is not None:
+        _insert_into_simulation(simulation, new_name, position, compiled)
+    return prod
@@ -0,0 +1,127 @@
+"""
+Monte Carlo runner: many stochastic simulations of the same model, spread over a pool of processes.
+Every worker builds the model once from a `ModelRecipe` and every run gets its own random seed, derived from the base seed and the run's index (so the results do not depend on the number of workers).
+"""
+
+from __future__ import annotations
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, NamedTuple
+
+import numpy as np
+from pyactr import ACTRModel
+
+from pyactr_oo_syntax.runtime.hooks import add_event_listener
+from pyactr_oo_syntax.runtime.recipe import ModelRecipe, PreparedModel
+
+RULE_FIRED = 'RULE FIRED: '
+KEY_PRESSED = 'KEY PRESSED: '
+
+
+class RunResult(NamedTuple):
+    rt: float|None # time of the first response, None if there was none
+    response: str|None
+    fired: Counter[str]
+    end_time: float
+
+
+class MonteCarloResult:
+    def __init__(self):
+        self.rts:list[float] = []
+        self.responses:Counter[str] = Counter()
+        self.no_response:int = 0
+        self.fired:Counter[str] = Counter() # number of firings per production, summed over all runs
+        self.runs:int = 0
+
+    def add(self, result:RunResult) -> MonteCarloResult:
+        if result.rt is None:
+            self.no_response += 1
+        else:
+            self.rts.append(result.rt)
+            self.responses[result.response] += 1
+        self.fired.update(result.fired)
+        self.runs += 1
+        return self
+
+    def merge(self, other:MonteCarloResult) -> MonteCarloResult:
+        self.rts.extend(other.rts)
+        self.responses.update(other.responses)
+        self.no_response += other.no_response
+        self.fired.update(other.fired)
+        self.runs += other.runs
+        return self
+
+    def rt_array(self) -> np.ndarray:
+        return np.array(self.rts)
+
+    def mean_rt(self) -> float:
+        return float(np.mean(self.rts)) if self.rts else math.nan
+
+    def rt_quantiles(self, quantiles:Iterable[float]=(0.1, 0.3, 0.5, 0.7, 0.9)) -> dict[float, float]:
+        quantiles = list(quantiles)
+        if not self.rts:
+            return {quantile: math.nan for quantile in quantiles}
+        return dict(zip(quantiles, np.quantile(self.rts, quantiles).tolist()))
+
+    def __repr__(self) -> str:
+        return f"MonteCarloResult(runs={self.runs}, mean_rt={self.mean_rt():.4f}, no_response={self.no_response}, fired={dict(self.fired)})"
+
+
+## Single Runs ##
+
+def run_seed(seed:int|None, index:int) -> np.ndarray:
+    # independent streams per run, see numpy.random.SeedSequence
+    return np.random.SeedSequence(seed, spawn_key=(index,)).generate_state(4)
+
+
+def simulate(model:ACTRModel, max_time:float=10, response_prefix:str=KEY_PRESSED) -> RunResult:
+    rt, response = None, None
+    fired = Counter()
+    def listen(event):
+        nonlocal rt, response
+        if event.action.startswith(RULE_FIRED):
+            fired[event.action[len(RULE_FIRED):]] += 1
+        elif rt is None and event.action.startswith(response_prefix):
+            rt, response = float(event.time), event.action[len(response_prefix):]
+
+    simulation = add_event_listener(model.simulation(trace=False, gui=False), listen)
+    simulation.run(max_time=max_time)
+    return RunResult(rt=rt, response=response, fired=fired, end_time=float(simulation.show_time()))
+
+
+## Workers ##
+
+_prepared_model:PreparedModel|None = None
+
+def _init_worker(recipe:ModelRecipe):
+    global _prepared_model
+    _prepared_model = recipe.prepare()
+
+
+def _run_batch(seed:int|None, indices:range, max_time:float, response_prefix:str) -> MonteCarloResult:
+    result = MonteCarloResult()
+    for index in indices:
+        np.random.seed(run_seed(seed, index))
+        result.add(simulate(_prepared_model.new_model(), max_time=max_time, response_prefix=response_prefix))
+    return result
+
+
+def run_monte_carlo(recipe:ModelRecipe, runs:int, seed:int|None=None, max_time:float=10, response_prefix:str=KEY_PRESSED, max_workers:int|None=None, batches_per_worker:int=4) -> MonteCarloResult:
+    # max_workers=1 runs everything in this process (e.g., for debugging); batches_per_worker > 1 balances the load when runs take different amounts of time
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if max_workers == 1:
+        _init_worker(recipe)
+        return _run_batch(seed, range(runs), max_time, response_prefix)
+
+    batch_size = max(1, math.ceil(runs / (max_workers * batches_per_worker)))
+    batches = [range(start, min(start + batch_size, runs)) for start in range(0, runs, batch_size)]
+    result = MonteCarloResult()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(recipe,)) as executor:
+        for batch_result in executor.map(_run_batch, [seed] * len(batches), batches, [max_time] * len(batches), [response_prefix] * len(batches)):
+            result.merge(batch_result)
+    return result
@@ -0,0 +1,168 @@
+"""
+Per-production profiler: counts how often each production is tested during conflict resolution (match attempts) and fired, the wall-clock time spent testing it, and the simulated time from its firing until the next production fires, keyed by the production's name (`production.get_name()`).
+The numbers are summed over all simulations of a model.
+"""
+
+from __future__ import annotations
+from time import perf_counter_ns
+from typing import Iterable, NamedTuple
+from weakref import WeakKeyDictionary
+
+from pyactr import ACTRModel
+from pyactr.simulation import Event, Simulation
+
+from pyactr_oo_syntax.runtime.hooks import add_event_listener, add_simulation_hook, get_production_rules, remove_simulation_hook, set_fork_installer
+
+RULE_FIRED = 'RULE FIRED: '
+
+
+class ProductionStats(NamedTuple):
+    name: str
+    fired: int
+    match_attempts: int
+    match_seconds: float # wall-clock time spent testing the production during conflict resolution (building its LHS and testing it)
+    simulated_time: float # simulated time from each firing until the next firing of any production
+
+
+class ProductionProfile:
+    def __init__(self):
+        self.fired:dict[str, int] = {}
+        self.match_attempts:dict[str, int] = {}
+        self.match_ns:dict[str, int] = {}
+        self.simulated_time:dict[str, float] = {}
+        self.simulations:int = 0
+
+    def stats(self) -> list[ProductionStats]:
+        # sorted by wall-clock matching time (most expensive first)
+        names = set(self.match_attempts) | set(self.fired)
+        return sorted((ProductionStats(
+            name=name,
+            fired=self.fired.get(name, 0),
+            match_attempts=self.match_attempts.get(name, 0),
+            match_seconds=self.match_ns.get(name, 0) / 1e9,
+            simulated_time=self.simulated_time.get(name, 0.)
+        ) for name in names), key=lambda stats: (-stats.match_seconds, stats.name))
+
+    def merge(self, other:ProductionProfile) -> ProductionProfile:
+        for own, others in ((self.fired, other.fired), (self.match_attempts, other.match_attempts), (self.match_ns, other.match_ns), (self.simulated_time, other.simulated_time)):
+            for name, value in others.items():
+                own[name] = own.get(name, 0) + value
+        self.simulations += other.simulations
+        return self
+
+    def reset(self) -> ProductionProfile:
+        # cleared in place, since running simulations hold references to the dicts
+        for values in (self.fired, self.match_attempts, self.match_ns, self.simulated_time):
+            values.clear()
+        self.simulations = 0
+        return self
+
+    def table(self, limit:int|None=None) -> str:
+        lines = [f"{'production':<40}{'fired':>10}{'attempts':>12}{'match ms':>12}{'us/attempt':>12}{'sim. time':>12}"]
+        for stats in self.stats()[:limit]:
+            per_attempt = stats.match_seconds * 1e6 / stats.match_attempts if stats.match_attempts else 0.
+            lines.append(f"{stats.name:<40}{stats.fired:>10}{stats.match_attempts:>12}{stats.match_seconds * 1000:>12.3f}{per_attempt:>12.2f}{stats.simulated_time:>12.4f}")
+        return '\n'.join(lines)
+
+    def folded(self, metric:str='match') -> str:
+        # flame graph input in the "folded stacks" format (one `frame;frame value` per line, e.g., for flamegraph.pl or speedscope)
+        # metric: 'match' (wall-clock microseconds of conflict resolution per production) or 'simulated' (simulated milliseconds after firings per production)
+        if metric == 'match':
+            values = {name: ns // 1000 for name, ns in self.match_ns.items()}
+            root = 'conflict_resolution'
+        elif metric == 'simulated':
+            values = {name: round(time * 1000) for name, time in self.simulated_time.items()}
+            root = 'simulated_time'
+        else:
+            raise ValueError(f"Unknown metric '{metric}', use 'match' or 'simulated'.")
+        return '\n'.join(f"{root};{name} {value}" for name, value in sorted(values.items()) if value > 0)
+
+    def __repr__(self) -> str:
+        return f"ProductionProfile(simulations={self.simulations}, productions={len(set(self.match_attempts) | set(self.fired))}, fired={sum(self.fired.values())})"
+
+
+## Instrumentation of Simulations ##
+
+_timed_classes:dict[type, type] = {}
+
+def _timed_class(cls:type) -> type:
+    # pyactr sets `used_rulename` first in every iteration of conflict resolution, before it builds the production's LHS (`rule()` and `next(production)`) and tests it; the subclass records when
+    timed = _timed_classes.get(cls)
+    if timed is None:
+        def get_used_rulename(self) -> str|None:
+            return self.__dict__.get('used_rulename')
+        def set_used_rulename(self, name:str|None):
+            self.__dict__['used_rulename'] = name
+            self.__dict__['_iteration_start_ns'] = perf_counter_ns()
+        timed = _timed_classes[cls] = type(cls.__name__, (cls,), {'__module__': cls.__module__, 'used_rulename': property(get_used_rulename, set_used_rulename)})
+    return timed
+
+
+def profile_simulation(simulation:Simulation, profile:ProductionProfile) -> Simulation:
+    production_rules = get_production_rules(simulation)
+    match_attempts, match_ns = profile.match_attempts, profile.match_ns
+    production_rules.__class__ = _timed_class(type(production_rules))
+
+    # a match attempt is timed from the start of its iteration of conflict resolution to the end of its LHS test; the test of the selected production before firing (update=True) is not an attempt
+    lhs_test = production_rules.LHStest
+    def LHStest(dictionary, actrvariables, update=False):
+        if update:
+            return lhs_test(dictionary, actrvariables, update)
+        try:
+            return lhs_test(dictionary, actrvariables)
+        finally:
+            name = production_rules.used_rulename
+            match_ns[name] = match_ns.get(name, 0) + perf_counter_ns() - production_rules._iteration_start_ns
+            match_attempts[name] = match_attempts.get(name, 0) + 1
+    production_rules.LHStest = LHStest
+
+    fired, simulated_time = profile.fired, profile.simulated_time
+    last_name, last_time = None, 0.
+    def listen(event:Event):
+        nonlocal last_name, last_time
+        if event.action.startswith(RULE_FIRED):
+            name, time = event.action[len(RULE_FIRED):], float(event.time)
+            if last_name is not None:
+                simulated_time[last_name] = simulated_time.get(last_name, 0.) + time - last_time
+            fired[name] = fired.get(name, 0) + 1
+            last_name, last_time = name, time
+    add_event_listener(simulation, listen)
+    profile.simulations += 1
+    return simulation
+
+
+## Models ##
+
+_profiles:WeakKeyDictionary[ACTRModel, ProductionProfile] = WeakKeyDictionary()
+
+def _profile_new_simulation(model:ACTRModel, simulation:Simulation):
+    profile_simulation(simulation, _profiles[model])
+
+
+def install_profiler(model:ACTRModel) -> ProductionProfile:
+    # every simulation of the model is profiled (the time after the last firing of a simulation is not attributed to any production)
+    profile = _profiles.get(model)
+    if profile is None:
+        profile = _profiles[model] = ProductionProfile()
+    add_simulation_hook(model, _profile_new_simulation)
+    return profile
+
+
+# copies of a model (forks of a snapshot) get their own profile
+set_fork_installer(_profile_new_simulation, install_profiler)
+
+
+def uninstall_profiler(model:ACTRModel) -> ProductionProfile|None:
+    remove_simulation_hook(model, _profile_new_simulation)
+    return _profiles.pop(model, None)
+
+
+def get_profile(model:ACTRModel) -> ProductionProfile|None:
+    return _profiles.get(model)
+
+
+def merge_profiles(profiles:Iterable[ProductionProfile]) -> ProductionProfile:
+    merged = ProductionProfile()
+    for profile in profiles:
+        merged.merge(profile)
+    return merged
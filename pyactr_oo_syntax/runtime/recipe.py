@@ -0,0 +1,74 @@
+"""
+Picklable description of a model (compiled productions, decmem chunks, goal chunk, and model parameters) that can be sent to other processes and turned into fresh pyactr models there.
+"""
+
+from __future__ import annotations
+from typing import Callable, Iterable, NamedTuple
+
+from pyactr import ACTRModel
+
+from pyactr_oo_syntax.base.compilation import CompiledChunk, add_compiled_production, build_chunk, production_function
+from pyactr_oo_syntax.base.decmem_loader import ChunkSource, add_compiled_chunks_to_decmem, chunk_presentations, compile_chunk_source
+from pyactr_oo_syntax.base.model_cache import CompiledModel
+from pyactr_oo_syntax.base.rule_and_production import production_sequence
+from pyactr_oo_syntax.runtime.conflict_index import install_conflict_index
+
+
+class ModelRecipe(NamedTuple):
+    compiled: CompiledModel
+    goal: CompiledChunk|None = None
+    goal_buffer: str = 'g'
+    model_kwargs: dict|None = None
+    setup: Callable[[ACTRModel], None]|None = None # called with every new model (e.g., to add further buffers); has to be picklable, i.e., a module-level function
+    indexed: bool = False # see `production_sequence.add_to_model`
+
+    @classmethod
+    def from_objects(cls, productions:production_sequence, chunks:Iterable[ChunkSource|tuple[ChunkSource, float]]=(), goal:ChunkSource|None=None, time:float|None=0, time_key:str='time', goal_buffer:str='g', setup:Callable[[ACTRModel], None]|None=None, indexed:bool=False, **model_kwargs) -> ModelRecipe:
+        compiled_productions = []
+        for index, prod in enumerate(productions):
+            compiled = prod.compile()
+            # unnamed productions would all get the same name from pyactr's counter, so they are numbered instead
+            compiled_productions.append(compiled if compiled.name else compiled._replace(name=f'unnamedrule{index}'))
+        return cls(
+            compiled=CompiledModel(
+                productions=tuple(compiled_productions),
+                chunks=tuple((compile_chunk_source(chunk), chunk_time) for chunk, chunk_time in chunk_presentations(chunks, time, time_key))
+            ),
+            goal=compile_chunk_source(goal) if goal is not None else None,
+            goal_buffer=goal_buffer,
+            model_kwargs=model_kwargs,
+            setup=setup,
+            indexed=indexed
+        )
+
+    def prepare(self) -> PreparedModel:
+        return PreparedModel(self)
+
+    def build(self) -> ACTRModel:
+        return self.prepare().new_model()
+
+
+class PreparedModel:
+    # the expensive part of building (production functions, decmem chunks) is done once; every new model only gets a copy of declarative memory
+    def __init__(self, recipe:ModelRecipe):
+        self.recipe = recipe
+        self.productions = [(compiled, production_function(compiled)) for compiled in recipe.compiled.productions]
+        template = ACTRModel(**(recipe.model_kwargs or {}))
+        add_compiled_chunks_to_decmem(template, recipe.compiled.chunks)
+        self.decmem = template.decmem
+
+    def new_model(self) -> ACTRModel:
+        model = ACTRModel(**(self.recipe.model_kwargs or {}))
+        for compiled, rule in self.productions:
+            add_compiled_production(model, compiled, rule)
+        model.decmems['decmem'] = self.decmem.copy()
+
+        if self.recipe.goal_buffer not in model.goals:
+            model.set_goal(self.recipe.goal_buffer)
+        if self.recipe.goal is not None:
+            model.goals[self.recipe.goal_buffer].add(build_chunk(self.recipe.goal))
+        if self.recipe.setup is not None:
+            self.recipe.setup(model)
+        if self.recipe.indexed:
+            install_conflict_index(model)
+        return model
@@ -0,0 +1,184 @@
+"""
+Snapshots of models (e.g., after loading a large declarative memory and a warm-up simulation) that can be forked many times: the declarative memory of the snapshot is frozen and shared by all forks, which only store their own changes (copy-on-write).
+"""
+
+from __future__ import annotations
+import itertools
+from collections.abc import MutableMapping
+from typing import Iterator, NamedTuple
+
+from pyactr import ACTRModel
+from pyactr.chunks import Chunk
+from pyactr.declarative import DecMem
+
+from pyactr_oo_syntax.base.compilation import _compiled_productions
+from pyactr_oo_syntax.runtime.bounded_decmem import BoundedDecMem
+from pyactr_oo_syntax.runtime.decmem_index import IndexedDecMem
+from pyactr_oo_syntax.runtime.hooks import _simulation_hooks, copy_simulation_hooks
+
+
+class _Overlay(MutableMapping):
+    # mapping of chunks to presentation times: reads fall through to the shared base (never modified), writes and deletions are stored in the overlay
+    # pyactr never changes the time arrays in place (new presentations create new arrays), so the arrays of the base can be shared as well
+    __slots__ = ('base', 'changed', 'deleted')
+
+    def __init__(self, base:dict):
+        self.base = base
+        self.changed:dict = {}
+        self.deleted:set = set()
+
+    def __getitem__(self, key):
+        try:
+            return self.changed[key]
+        except KeyError:
+            if key in self.deleted:
+                raise
+            return self.base[key]
+
+    def __setitem__(self, key, value):
+        self.changed[key] = value
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key in self.changed:
+            del self.changed[key]
+            if key in self.base:
+                self.deleted.add(key)
+        elif key in self.base and key not in self.deleted:
+            self.deleted.add(key)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.changed or (key in self.base and key not in self.deleted)
+
+    def __iter__(self) -> Iterator:
+        # in the order of the base, followed by new chunks
+        deleted, changed = self.deleted, self.changed
+        for key in self.base:
+            if key not in deleted:
+                yield key
+        for key in changed:
+            if key not in self.base:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self.deleted) + sum(1 for key in self.changed if key not in self.base)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def copy(self) -> dict:
+        return dict(self)
+
+
+class CopyOnWriteDecMem(DecMem):
+    # declarative memory on top of a frozen base: only chunks that are added or presented again after the fork are stored (in addition to the fan counters for spreading activation and manually set activations, which are copied)
+    def __init__(self, base:dict[Chunk, object], activations:dict|None=None, restricted_number_chunks=None, unrestricted_number_chunks=None):
+        super().__init__()
+        self._data = _Overlay(base)
+        if activations:
+            self.activations = dict(activations)
+        if restricted_number_chunks:
+            self.restricted_number_chunks.update(restricted_number_chunks)
+        if unrestricted_number_chunks:
+            self.unrestricted_number_chunks.update(unrestricted_number_chunks)
+
+    def copy(self) -> CopyOnWriteDecMem:
+        # shares the base as well, only the changes are copied
+        dm = CopyOnWriteDecMem(self._data.base, self.activations, self.restricted_number_chunks, self.unrestricted_number_chunks)
+        dm._data.changed.update(self._data.changed)
+        dm._data.deleted.update(self._data.deleted)
+        return dm
+
+    def delta_size(self) -> int:
+        # number of chunks that differ from the base
+        return len(self._data.changed) + len(self._data.deleted)
+
+
+_archive_copies = itertools.count(1)
+
+class FrozenDecMem(NamedTuple):
+    data: dict[Chunk, object] # shared by all forks, must not be changed
+    activations: dict
+    restricted_number_chunks: dict
+    unrestricted_number_chunks: dict
+    # indexed and bounded declarative memories keep their type on forks: their index and eviction state belong to each fork, so every fork gets a full copy of this one instead of copy-on-write
+    # the archive of a bounded declarative memory is copied as well (`<path>.snapshot<n>`, forks: `<path>.snapshot<n>.fork<m>`), so forks do not restore each other's chunks
+    template: IndexedDecMem|None = None
+    forks: itertools.count|None = None
+
+    @classmethod
+    def of(cls, decmem:DecMem) -> FrozenDecMem:
+        # flat copy of the mapping (references only), so the original model can go on without affecting the forks
+        template = None
+        if isinstance(decmem, BoundedDecMem):
+            template = decmem.copy(decmem.archive.copy(f"{decmem.archive.path}.snapshot{next(_archive_copies)}") if decmem.archive is not None else None)
+        elif isinstance(decmem, IndexedDecMem):
+            template = decmem.copy()
+        return cls(
+            data=dict(decmem._data),
+            activations=dict(decmem.activations),
+            restricted_number_chunks=dict(decmem.restricted_number_chunks),
+            unrestricted_number_chunks=dict(decmem.unrestricted_number_chunks),
+            template=template,
+            forks=itertools.count(1)
+        )
+
+    def fork(self) -> DecMem:
+        if isinstance(self.template, BoundedDecMem):
+            archive = self.template.archive
+            return self.template.copy(archive.copy(f"{archive.path}.fork{next(self.forks)}") if archive is not None else None)
+        if self.template is not None:
+            return self.template.copy()
+        return CopyOnWriteDecMem(self.data, self.activations, self.restricted_number_chunks, self.unrestricted_number_chunks)
+
+
+class ModelSnapshot:
+    # state of a model at one point in time: productions (incl. learned utilities), model parameters, declarative memories, and the contents of goal and retrieval buffers
+    # visual buffers, the state of the environment, and requests that are still being processed (e.g., a running retrieval) are not part of the snapshot, so it should be taken when the simulation has finished or its modules are idle
+    def __init__(self, model:ACTRModel, time:float=0):
+        # time: simulation time at which the snapshot is taken (e.g., `simulation.show_time()` after a warm-up), forks should start their simulations there (`fork.simulation(initial_time=snapshot.time)`)
+        self.time = time
+        self.environment = model._ACTRModel__env
+        self.model_parameters = dict(model.model_parameters)
+        self.similarities = dict(model._ACTRModel__similarities)
+        self.productions = {name: dict(production) for name, production in model.productions.items()}
+        self.compiled_productions = dict(_compiled_productions.get(model, {}))
+        self.hooks = list(_simulation_hooks.get(model, []))
+
+        decmem_names = {id(decmem): name for name, decmem in model.decmems.items()}
+        self.decmems = {name: FrozenDecMem.of(decmem) for name, decmem in model.decmems.items()}
+        # buffer name -> (chunks in the buffer, name of the buffer's decmem, delay / finst)
+        self.goals = {name: (set(goal), decmem_names.get(id(goal.dm)), goal.delay) for name, goal in model.goals.items()}
+        self.retrievals = {name: (set(retrieval), decmem_names.get(id(retrieval.dm)), retrieval.finst) for name, retrieval in model.retrievals.items()}
+
+    def fork(self) -> ACTRModel:
+        model = ACTRModel(self.environment, **self.model_parameters)
+        for name, similarity in self.similarities.items():
+            model._ACTRModel__similarities[name] = similarity
+
+        # production functions are stateless and shared, their entries (utility, reward) are copied
+        for name, production in self.productions.items():
+            model.productions.update({name: dict(production)})
+        if self.compiled_productions:
+            _compiled_productions[model] = dict(self.compiled_productions)
+
+        model.decmems.clear()
+        for name, frozen in self.decmems.items():
+            model.decmems[name] = frozen.fork()
+        for name, (chunks, decmem_name, delay) in self.goals.items():
+            goal = model.goals[name] if name in model.goals else model.set_goal(name, delay)
+            goal.delay = delay
+            goal.dm = model.decmems.get(decmem_name)
+            for chunk in chunks:
+                goal.add(chunk)
+        for name, (chunks, decmem_name, finst) in self.retrievals.items():
+            retrieval = model.retrievals[name] if name in model.retrievals else model.set_retrieval(name)
+            retrieval.finst = finst
+            retrieval.dm = model.decmems.get(decmem_name)
+            for chunk in chunks:
+                retrieval._data.add(chunk) # not `add`, which would clear the buffer into declarative memory
+
+        # hooks with state per model (e.g., the profiler) are installed anew, so every fork has its own state
+        return copy_simulation_hooks(model, self.hooks)
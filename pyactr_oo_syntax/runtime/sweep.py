@@ -0,0 +1,176 @@
+"""
+Parameter sweeps over a model that is compiled once: `ReusableModel` keeps the link to the `production` objects it was built from and changes utilities, rewards, and model parameters without rebuilding; `run_sweep` runs a grid of parameter points in a process pool.
+Every parameter point is simulated with the same seeds (common random numbers), so differences between points are not due to different random sequences.
+"""
+
+from __future__ import annotations
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Mapping, NamedTuple
+
+import numpy as np
+from pyactr import ACTRModel
+from pyactr.utilities import ACTRError
+
+from pyactr_oo_syntax.base.decmem_loader import ChunkSource
+from pyactr_oo_syntax.base.rule_and_production import production, production_sequence
+from pyactr_oo_syntax.runtime.monte_carlo import KEY_PRESSED, MonteCarloResult, RunResult, run_seed, simulate
+from pyactr_oo_syntax.runtime.recipe import ModelRecipe, PreparedModel
+
+
+class ParameterPoint(NamedTuple):
+    utilities: Mapping[str, float] = {} # per production name
+    rewards: Mapping[str, float|None] = {} # per production name
+    model_parameters: Mapping[str, object] = {} # see `ACTRModel.MODEL_PARAMETERS`
+
+
+def parameter_grid(utilities:Mapping[str, Iterable[float]]|None=None, rewards:Mapping[str, Iterable[float|None]]|None=None, model_parameters:Mapping[str, Iterable]|None=None) -> list[ParameterPoint]:
+    # all combinations of the given values, e.g., parameter_grid(utilities={'retrieve': [0, 1, 2]}, model_parameters={'utility_noise': [0.1, 0.5]}) -> 6 points
+    axes = [('utilities', name, list(values)) for name, values in (utilities or {}).items()]
+    axes += [('rewards', name, list(values)) for name, values in (rewards or {}).items()]
+    axes += [('model_parameters', name, list(values)) for name, values in (model_parameters or {}).items()]
+    points = []
+    for combination in itertools.product(*(values for _, _, values in axes)):
+        fields = {'utilities': {}, 'rewards': {}, 'model_parameters': {}}
+        for (field, name, _), value in zip(axes, combination):
+            fields[field][name] = value
+        points.append(ParameterPoint(**fields))
+    return points
+
+
+def apply_parameters(model:ACTRModel, point:ParameterPoint) -> ACTRModel:
+    for field, key in ((point.utilities, 'utility'), (point.rewards, 'reward')):
+        for name, value in field.items():
+            if name not in model.productions:
+                raise ValueError(f"The model has no production named '{name}'.")
+            model.productions[name][key] = value
+    unknown = set(point.model_parameters).difference(ACTRModel.MODEL_PARAMETERS)
+    if unknown:
+        raise ACTRError(f"Incorrect model parameter(s) {unknown}. The only possible model parameters are: '{set(ACTRModel.MODEL_PARAMETERS)}'")
+    model.model_parameters.update(point.model_parameters)
+    return model
+
+
+class ReusableModel:
+    # compiled once; `reset` gives a fresh model (declarative memory, buffers, learned utilities) with the current parameters, which only copies declarative memory and does not compile anything
+    def __init__(self, recipe:ModelRecipe, productions:Iterable[production]=()):
+        self.recipe = recipe
+        self.prepared = PreparedModel(recipe)
+        # production objects by the name they have in the model (unnamed productions are numbered in the recipe)
+        self.__productions:dict[str, production] = {compiled.name: prod for compiled, prod in zip(recipe.compiled.productions, productions)}
+        self.__utilities:dict[str, float] = {compiled.name: compiled.utility for compiled in recipe.compiled.productions}
+        self.__rewards:dict[str, float|None] = {compiled.name: compiled.reward for compiled in recipe.compiled.productions}
+        self.__model_parameters:dict[str, object] = {}
+        self.model:ACTRModel = self.reset()
+
+    @classmethod
+    def from_objects(cls, productions:production_sequence, chunks:Iterable[ChunkSource|tuple[ChunkSource, float]]=(), goal:ChunkSource|None=None, **recipe_kwargs) -> ReusableModel:
+        # see `ModelRecipe.from_objects`
+        return cls(ModelRecipe.from_objects(productions, chunks=chunks, goal=goal, **recipe_kwargs), productions)
+
+    def __name_of(self, prod:production|str) -> str:
+        if isinstance(prod, str):
+            name = prod
+        else:
+            name = next((name for name, linked in self.__productions.items() if linked is prod), None)
+            if name is None:
+                raise ValueError(f"The production '{prod.get_name()}' is not part of this model.")
+        if name not in self.__utilities:
+            raise ValueError(f"The model has no production named '{name}'.")
+        return name
+
+    def parameters(self) -> ParameterPoint:
+        return ParameterPoint(utilities=dict(self.__utilities), rewards=dict(self.__rewards), model_parameters=dict(self.__model_parameters))
+
+    def set_utility(self, prod:production|str, utility:float) -> ReusableModel:
+        return self.set_parameters(ParameterPoint(utilities={self.__name_of(prod): utility}))
+
+    def set_reward(self, prod:production|str, reward:float|None) -> ReusableModel:
+        return self.set_parameters(ParameterPoint(rewards={self.__name_of(prod): reward}))
+
+    def set_model_parameters(self, **model_parameters) -> ReusableModel:
+        return self.set_parameters(ParameterPoint(model_parameters=model_parameters))
+
+    def set_parameters(self, point:ParameterPoint) -> ReusableModel:
+        # applied to the current model in place and kept for every reset
+        apply_parameters(self.model, point)
+        self.__utilities.update(point.utilities)
+        self.__rewards.update(point.rewards)
+        self.__model_parameters.update(point.model_parameters)
+        return self
+
+    def sync(self) -> ReusableModel:
+        # takes over utilities and rewards that were changed on the linked production objects (`set_utility` / `set_reward`)
+        return self.set_parameters(ParameterPoint(
+            utilities={name: prod.get_utility() for name, prod in self.__productions.items()},
+            rewards={name: prod.get_reward() for name, prod in self.__productions.items()}
+        ))
+
+    def reset(self) -> ACTRModel:
+        self.model = apply_parameters(self.prepared.new_model(), self.parameters())
+        return self.model
+
+    def run(self, max_time:float=10, seed:int|None=None, response_prefix:str=KEY_PRESSED) -> RunResult:
+        # every run starts from a fresh state
+        if seed is not None:
+            np.random.seed(seed)
+        return simulate(self.reset(), max_time=max_time, response_prefix=response_prefix)
+
+    def sweep(self, points:Iterable[ParameterPoint], runs:int=1, seed:int|None=None, max_time:float=10, response_prefix:str=KEY_PRESSED, max_workers:int|None=1) -> list[tuple[ParameterPoint, MonteCarloResult]]:
+        # the points are applied on top of the current parameters (the results are returned with the given points)
+        points = list(points)
+        base = self.parameters()
+        combined = [ParameterPoint(
+            utilities={**base.utilities, **point.utilities},
+            rewards={**base.rewards, **point.rewards},
+            model_parameters={**base.model_parameters, **point.model_parameters}
+        ) for point in points]
+        if max_workers == 1:
+            # no need to prepare the model again
+            results = _sweep_locally(self.prepared, combined, runs, seed, max_time, response_prefix)
+        else:
+            results = run_sweep(self.recipe, combined, runs=runs, seed=seed, max_time=max_time, response_prefix=response_prefix, max_workers=max_workers)
+        return [(point, result) for point, (_, result) in zip(points, results)]
+
+
+## Workers ##
+
+_prepared_model:PreparedModel|None = None
+
+def _init_worker(recipe:ModelRecipe):
+    global _prepared_model
+    _prepared_model = recipe.prepare()
+
+
+def _run_point(point:ParameterPoint, seed:int, runs:int, max_time:float, response_prefix:str) -> MonteCarloResult:
+    result = MonteCarloResult()
+    for index in range(runs):
+        np.random.seed(run_seed(seed, index))
+        result.add(simulate(apply_parameters(_prepared_model.new_model(), point), max_time=max_time, response_prefix=response_prefix))
+    return result
+
+
+def _sweep_locally(prepared:PreparedModel, points:Iterable[ParameterPoint], runs:int, seed:int|None, max_time:float, response_prefix:str) -> list[tuple[ParameterPoint, MonteCarloResult]]:
+    global _prepared_model
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    _prepared_model = prepared
+    return [(point, _run_point(point, seed, runs, max_time, response_prefix)) for point in points]
+
+
+def run_sweep(recipe:ModelRecipe, points:Iterable[ParameterPoint], runs:int=1, seed:int|None=None, max_time:float=10, response_prefix:str=KEY_PRESSED, max_workers:int|None=None) -> list[tuple[ParameterPoint, MonteCarloResult]]:
+    # every worker prepares the model once and then simulates whole parameter points (`runs` runs each, with the same seeds for every point)
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    points = list(points)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if max_workers == 1:
+        return _sweep_locally(recipe.prepare(), points, runs, seed, max_time, response_prefix)
+
+    chunksize = max(1, math.ceil(len(points) / (max_workers * 4)))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(recipe,)) as executor:
+        results = executor.map(_run_point, points, [seed] * len(points), [runs] * len(points), [max_time] * len(points), [response_prefix] * len(points), chunksize=chunksize)
+        return list(zip(points, results))
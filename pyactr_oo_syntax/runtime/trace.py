@@ -0,0 +1,180 @@
+"""
+Structured trace of simulations: instead of printing events (`trace=True`) and parsing the text, every event of the modules is turned into a typed `TraceEvent` and passed to a callback (or yielded by `iter_trace`), optionally collected into columnar NumPy arrays (`ColumnarTrace`).
+Events can be filtered by kind and buffer before any record is created, so long runs only keep what is needed.
+"""
+
+from __future__ import annotations
+from enum import Enum
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+import numpy as np
+from pyactr.simulation import Event, Simulation
+from simpy.core import EmptySchedule
+
+from pyactr_oo_syntax.base.rule_and_production import production
+from pyactr_oo_syntax.helpers.data_types import Buffer
+from pyactr_oo_syntax.runtime.hooks import add_event_listener
+
+PROCEDURAL = 'PROCEDURAL'
+
+
+class EventKind(Enum):
+    CONFLICT_RESOLUTION = 'CONFLICT RESOLUTION'
+    RULE_SELECTED = 'RULE SELECTED: '
+    RULE_FIRED = 'RULE FIRED: '
+    RULE_STOPPED = 'RULE STOPPED FROM FIRING: '
+    RULE_COMPILED = 'RULE ' # production compilation ('RULE CREATED: ...', 'RULE RE-CREATED: ...'), tested after the other rule events
+    NO_RULE_FOUND = 'NO RULE FOUND'
+    RETRIEVAL_STARTED = 'START RETRIEVAL'
+    RETRIEVED = 'RETRIEVED: '
+    RETRIEVAL_FAILURE = 'RETRIEVED: None'
+    CLEARED = 'CLEARED'
+    MODIFIED = 'MODIFIED'
+    CHUNK_CREATED = 'CREATED A CHUNK: '
+    CHUNK_WRITTEN = 'WROTE A CHUNK: '
+    VISUAL_ENCODED = 'ENCODED '
+    MOTOR_COMMAND = 'COMMAND: '
+    KEY_PRESSED = 'KEY PRESSED: '
+    OTHER = ''
+
+    @classmethod
+    def of(cls, action:str) -> EventKind:
+        if action == cls.RETRIEVAL_FAILURE.value:
+            return cls.RETRIEVAL_FAILURE
+        for kind in _PREFIX_KINDS:
+            if action.startswith(kind.value):
+                return kind
+        return cls.OTHER
+
+_PREFIX_KINDS = tuple(kind for kind in EventKind if kind not in (EventKind.RETRIEVAL_FAILURE, EventKind.OTHER))
+_RULE_KINDS = (EventKind.RULE_SELECTED, EventKind.RULE_FIRED, EventKind.RULE_STOPPED)
+_DETAIL_KINDS = {kind for kind in EventKind if kind.value.endswith(' ')}
+
+
+class TraceEvent(NamedTuple):
+    time: float
+    kind: EventKind
+    buffer_name: str # pyactr's name of the module / buffer (e.g., 'g', 'retrieval', 'imaginal_pos', 'PROCEDURAL')
+    buffer: Buffer|None # None for the procedural module and buffers without an enum member (imaginal buffers)
+    detail: str # the part of the action after the kind (production name, retrieved chunk, key, ...)
+    production: production|None = None # for rule events, if the production is known to the trace
+
+
+def buffer_of(buffer_name:str) -> Buffer|None:
+    try:
+        return Buffer(buffer_name)
+    except ValueError:
+        return None
+
+
+def trace_simulation(simulation:Simulation, callback:Callable[[TraceEvent], None], kinds:Iterable[EventKind]|None=None, buffers:Iterable[Buffer|str]|None=None, productions:Iterable[production]|None=None) -> Simulation:
+    # kinds / buffers: only these events are turned into records (None: all)
+    # productions: rule events are linked to these production objects by name (see `production.set_name`)
+    kinds = set(kinds) if kinds is not None else None
+    buffer_names = {buffer.value if isinstance(buffer, Buffer) else buffer for buffer in buffers} if buffers is not None else None
+    productions_by_name = {prod.get_name(): prod for prod in productions} if productions is not None else {}
+    buffers_by_name:dict[str, Buffer|None] = {}
+
+    def listen(event:Event):
+        if buffer_names is not None and event.proc not in buffer_names:
+            return
+        kind = EventKind.of(event.action)
+        if kinds is not None and kind not in kinds:
+            return
+        detail = event.action[len(kind.value):] if kind in _DETAIL_KINDS else ''
+        buffer = buffers_by_name.get(event.proc)
+        if buffer is None and event.proc not in buffers_by_name:
+            buffer = buffers_by_name[event.proc] = buffer_of(event.proc)
+        callback(TraceEvent(
+            time=float(event.time),
+            kind=kind,
+            buffer_name=event.proc,
+            buffer=buffer,
+            detail=detail,
+            production=productions_by_name.get(detail) if kind in _RULE_KINDS else None
+        ))
+
+    return add_event_listener(simulation, listen)
+
+
+def iter_trace(simulation:Simulation, max_time:float=1, kinds:Iterable[EventKind]|None=None, buffers:Iterable[Buffer|str]|None=None, productions:Iterable[production]|None=None) -> Iterator[TraceEvent]:
+    # runs the simulation step by step (up to max_time) and yields the events as they happen; the simulation should be created with trace=False
+    pending:list[TraceEvent] = []
+    trace_simulation(simulation, pending.append, kinds=kinds, buffers=buffers, productions=productions)
+    while simulation.show_time() <= max_time:
+        try:
+            simulation.step()
+        except EmptySchedule:
+            break
+        for event in pending:
+            if event.time > max_time:
+                return
+            yield event
+        pending.clear()
+    yield from (event for event in pending if event.time <= max_time)
+
+
+class ColumnarTrace:
+    # collects events into growing NumPy arrays (time, kind, buffer, production) instead of a list of records; kinds, buffers, and productions are stored as codes into `kinds`, `buffer_names` and `production_names`
+    kinds:tuple[EventKind, ...] = tuple(EventKind)
+
+    def __init__(self, capacity:int=1024, details:bool=False):
+        # details: also keep the detail strings (in a list), which costs much more memory than the codes
+        self.__size = 0
+        self.__time = np.empty(capacity, dtype=np.float64)
+        self.__kind = np.empty(capacity, dtype=np.int8)
+        self.__buffer = np.empty(capacity, dtype=np.int16)
+        self.__production = np.empty(capacity, dtype=np.int32)
+        self.__kind_codes = {kind: code for code, kind in enumerate(self.kinds)}
+        self.__buffer_codes:dict[str, int] = {}
+        self.__production_codes:dict[str, int] = {}
+        self.details:list[str]|None = [] if details else None
+
+    def __call__(self, event:TraceEvent):
+        if self.__size == len(self.__time):
+            self.__grow()
+        index = self.__size
+        self.__time[index] = event.time
+        self.__kind[index] = self.__kind_codes[event.kind]
+        self.__buffer[index] = self.__buffer_codes.setdefault(event.buffer_name, len(self.__buffer_codes))
+        self.__production[index] = self.__production_codes.setdefault(event.detail, len(self.__production_codes)) if event.kind in _RULE_KINDS else -1
+        if self.details is not None:
+            self.details.append(event.detail)
+        self.__size += 1
+
+    def __grow(self):
+        capacity = max(1, 2 * len(self.__time))
+        self.__time = np.resize(self.__time, capacity)
+        self.__kind = np.resize(self.__kind, capacity)
+        self.__buffer = np.resize(self.__buffer, capacity)
+        self.__production = np.resize(self.__production, capacity)
+
+    def __len__(self) -> int:
+        return self.__size
+
+    @property
+    def buffer_names(self) -> list[str]:
+        return list(self.__buffer_codes)
+
+    @property
+    def production_names(self) -> list[str]:
+        return list(self.__production_codes)
+
+    def columns(self) -> dict[str, np.ndarray]:
+        # views on the collected part of the arrays (production: -1 for events that are not rule events)
+        return {
+            'time': self.__time[:self.__size],
+            'kind': self.__kind[:self.__size],
+            'buffer': self.__buffer[:self.__size],
+            'production': self.__production[:self.__size]
+        }
+
+    def times_of(self, kind:EventKind, production_name:str|None=None) -> np.ndarray:
+        columns = self.columns()
+        mask = columns['kind'] == self.__kind_codes[kind]
+        if production_name is not None:
+            mask &= columns['production'] == self.__production_codes.get(production_name, -2)
+        return columns['time'][mask]
+
+    def __repr__(self) -> str:
+        return f"ColumnarTrace(events={self.__size}, productions={len(self.__production_codes)})"
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+import pyactr as actr
+from pyactr.declarative import DecMem
+
+from pyactr_oo_syntax.runtime.activation import association_strengths
+from pyactr_oo_syntax.runtime.bounded_decmem import BoundedDecMem, ChunkArchive, EvictionPolicy
+
+
+def fact(index:int, **slots) -> actr.chunks.Chunk:
+    return actr.makechunk(typename='fact', key=f'k{index}', **slots)
+
+
+class BoundedDecMemTest(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore')
+
+    def test_capacity(self):
+        decmem = BoundedDecMem(capacity=10, evict_to=8, policy=EvictionPolicy.AGE)
+        for index in range(10):
+            decmem.add(fact(index), time=index)
+        self.assertEqual(len(decmem), 10)
+        decmem.add(fact(10), time=10)
+        self.assertEqual(len(decmem), 8)
+        self.assertIn(fact(10), decmem) # the chunk that is added is never evicted
+        stats = decmem.stats()
+        self.assertEqual((stats.size, stats.peak_size, stats.runs, stats.evicted), (8, 11, 1, 3))
+
+    def test_policy_order(self):
+        def evicted(policy:EvictionPolicy, prepare) -> list[int]:
+            decmem = BoundedDecMem(capacity=4, evict_to=2, policy=policy)
+            for index in range(4):
+                decmem.add(fact(index), time=index)
+            prepare(decmem)
+            decmem.add(fact(4), time=5)
+            return [index for index in range(4) if fact(index) not in decmem]
+        # oldest first (k0 is used, but still the oldest)
+        self.assertEqual(evicted(EvictionPolicy.AGE, lambda decmem: decmem.touch(fact(0), 4.5)), [0, 1, 2])
+        # least recently used first: k0 was retrieved, k1 presented again
+        def use(decmem:BoundedDecMem):
+            decmem.touch(fact(0), 4.5)
+            decmem.add(fact(1), time=4.6)
+        self.assertEqual(evicted(EvictionPolicy.LRU, use), [0, 2, 3])
+        # lowest base-level activation first: k3 was presented many times, k0 three times, the others once
+        def present(decmem:BoundedDecMem):
+            decmem.add(fact(3), time=np.linspace(3.1, 3.9, 8))
+            decmem.add(fact(0), time=[0.5, 0.6])
+        self.assertEqual(evicted(EvictionPolicy.BASE_LEVEL, present), [0, 1, 2])
+        self.assertEqual(evicted(EvictionPolicy.BASE_LEVEL, lambda decmem: decmem.add(fact(1), time=np.linspace(3.1, 3.9, 8))), [0, 2, 3])
+
+    def test_archive_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'archive')
+            decmem = BoundedDecMem(capacity=3, evict_to=2, policy=EvictionPolicy.AGE, archive=ChunkArchive(path))
+            decmem.add(fact(0, link=fact(9)), time=[0.5, 1.0])
+            decmem.activations[fact(0, link=fact(9))] = 0.7
+            for index in range(1, 4):
+                decmem.add(fact(index), time=2 + index)
+            self.assertEqual([archived.chunk for archived in decmem.archive], [fact(0, link=fact(9)), fact(1)])
+            archived = decmem.archive.get(fact(0, link=fact(9)))
+            self.assertEqual((list(archived.presentations), archived.activation), ([0.5, 1.0], 0.7))
+
+            self.assertTrue(decmem.restore(fact(0, link=fact(9))))
+            self.assertFalse(decmem.restore(fact(0, link=fact(9))))
+            self.assertEqual(list(decmem[fact(0, link=fact(9))]), [0.5, 1.0])
+            self.assertEqual(decmem.activations[fact(0, link=fact(9))], 0.7)
+            self.assertEqual(decmem.stats().restored, 1)
+            decmem.archive.close()
+
+            # restored records are skipped when the archive is opened again
+            with ChunkArchive(path) as archive:
+                self.assertEqual([archived.chunk for archived in archive], [fact(1)])
+                self.assertNotIn(fact(0, link=fact(9)), archive)
+
+    def test_fan_counters_after_eviction(self):
+        hub = actr.makechunk(nameofchunk='hub', typename='hub', name='hub')
+        other = actr.makechunk(nameofchunk='other', typename='hub', name='other')
+        decmem = BoundedDecMem(capacity=20, policy=EvictionPolicy.AGE)
+        never = DecMem()
+        for index, chunk in enumerate([hub, other, fact(0, link=other)]):
+            decmem.add(chunk, time=index)
+            never.add(chunk, time=index)
+        holders = [fact(index, link=hub, first=hub) for index in range(1, 6)]
+        for index, chunk in enumerate(holders):
+            decmem.add(chunk, time=3 + index)
+        sources = [('link', hub), ('link', other)]
+        for restricted in (False, True):
+            association_strengths(decmem, list(decmem), sources, 2., restricted)
+        self.assertEqual(decmem.unrestricted_number_chunks[hub], 11)
+        self.assertEqual(decmem.restricted_number_chunks[('link', hub)], 6)
+
+        # the same chunks in the same order as in `never` once all holders of hub are gone
+        decmem.evict(count=3) # hub, other, and fact(0)
+        decmem.add([hub, other, fact(0, link=other)], time=10)
+        for chunk in holders:
+            del decmem[chunk]
+        self.assertNotIn(hub, decmem.unrestricted_number_chunks)
+        self.assertNotIn(('link', hub), decmem.restricted_number_chunks)
+        for restricted in (False, True):
+            self.assertTrue(np.array_equal(association_strengths(decmem, list(decmem), sources, 2., restricted), association_strengths(never, list(never), sources, 2., restricted)))
+
+
+if __name__ == '__main__':
+    unittest.main()
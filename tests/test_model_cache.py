@@ -0,0 +1,46 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from pyactr_oo_syntax.base.model_cache import CompiledModel, ModelCache
+
+
+class _Unpicklable:
+    def __reduce__(self):
+        raise ValueError('cannot be pickled')
+
+
+class ModelCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ModelCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_unloadable_files_are_misses_and_deleted(self):
+        contents = {
+            'corrupted': b'\x80\x05not a pickle',
+            'truncated': pickle.dumps(CompiledModel((), ()))[:-3],
+            'moved_class': pickle.dumps(CompiledModel((), ())).replace(b'model_cache', b'moved_cache'),
+            'other_object': pickle.dumps({'productions': ()})
+        }
+        for key, data in contents.items():
+            with open(self.cache.path(key), 'wb') as file:
+                file.write(data)
+            self.assertIsNone(self.cache.get(key), key)
+            self.assertFalse(os.path.exists(self.cache.path(key)), key)
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_failed_put_leaves_no_files(self):
+        compiled = CompiledModel((), ())
+        self.cache.put('kept', compiled)
+        with self.assertRaises(ValueError):
+            self.cache.put('failed', CompiledModel((), ((_Unpicklable(), 0.),)))
+        self.assertEqual(os.listdir(self.directory.name), ['kept.pkl'])
+        self.assertEqual(self.cache.get('kept'), compiled)
+
+
+if __name__ == '__main__':
+    unittest.main()
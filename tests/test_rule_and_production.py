@@ -0,0 +1,54 @@
+import unittest
+import warnings
+
+import pyactr as actr
+
+from pyactr_oo_syntax.base.lisplike import e, p
+from pyactr_oo_syntax.base.rule_and_production import production_sequence
+
+
+def count_productions() -> production_sequence:
+    start = (e.GOAL_(isa='countFrom', start='=x', count='None') >> e.GOAL_(isa='countFrom', count='=x') & p.RETRIEVAL_(isa='count', first='=x')).set_name('start')
+    stop = (e.GOAL_(isa='countFrom', count='=x', end='=x') >> e.GOAL_(isa='countFrom', count='None')).set_name('stop')
+    return start + stop
+
+
+class SequenceListsTest(unittest.TestCase):
+    def test_in_place_changes_are_written_back_with_a_warning(self):
+        productions = count_productions()
+        start, stop = productions.productions
+        with self.assertWarns(DeprecationWarning):
+            productions.productions.append(start)
+        with self.assertWarns(DeprecationWarning):
+            productions.productions[0] = stop
+        self.assertEqual([prod.get_name() for prod in productions], ['stop', 'stop', 'start'])
+
+        lhs = start.get_lhs()
+        text = str(start)
+        with self.assertWarns(DeprecationWarning):
+            lhs.rules.append(p.RETRIEVAL_(isa='count', first='=x'))
+        self.assertEqual(len(lhs), 2)
+        self.assertNotEqual(str(start), text)
+
+    def test_reading_and_assigning_do_not_warn(self):
+        productions = count_productions()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.assertIsInstance(productions.productions, list)
+            productions.productions = productions.productions[:1]
+        self.assertEqual(len(productions), 1)
+
+
+class PrunedTest(unittest.TestCase):
+    def test_add_to_model_pruned_keeps_the_rules_of_the_remaining_productions(self):
+        warnings.simplefilter('ignore')
+        start = (e.RETRIEVAL_(isa='count', first='=x') & e.GOAL_(isa='countFrom', start='=x') >> e.GOAL_(isa='countFrom', count='=x')).set_name('start')
+        duplicate = (e.GOAL_(isa='countFrom', start='=x') & e.RETRIEVAL_(isa='count', first='=x') >> e.GOAL_(isa='countFrom', count='=x')).set_name('duplicate')
+        added = (start + duplicate).add_to_model(actr.ACTRModel(), pruned=True)
+        self.assertEqual(len(added), 1)
+        self.assertEqual(str(added.productions[0]), str(start))
+        self.assertNotEqual(str((start + duplicate).pruned().productions[0]), str(start))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+import warnings
+
+import pyactr as actr
+
+from pyactr_oo_syntax.runtime.bounded_decmem import BoundedDecMem, EvictionPolicy, get_eviction_stats, install_bounded_decmem
+from pyactr_oo_syntax.runtime.decmem_index import IndexedDecMem, install_decmem_index
+from pyactr_oo_syntax.runtime.snapshot import CopyOnWriteDecMem, ModelSnapshot
+
+
+def fact(index:int) -> actr.chunks.Chunk:
+    return actr.makechunk(typename='fact', key=f'k{index}', value=str(index % 3))
+
+
+class ForkedDecMemTest(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore')
+
+    def test_plain_decmem_is_copy_on_write(self):
+        model = actr.ACTRModel()
+        model.decmem.add([fact(index) for index in range(5)])
+        fork = ModelSnapshot(model).fork()
+        self.assertIsInstance(fork.decmem, CopyOnWriteDecMem)
+        self.assertEqual(len(fork.decmem), 5)
+
+    def test_indexed_decmem_stays_indexed(self):
+        model = actr.ACTRModel()
+        model.decmem.add([fact(index) for index in range(9)])
+        install_decmem_index(model)
+        fork = ModelSnapshot(model).fork()
+        self.assertIsInstance(fork.decmem, IndexedDecMem)
+        fork.decmem.add(fact(9))
+        self.assertEqual(fork.decmem.candidates([('value', '0')]), [fact(index) for index in (0, 3, 6, 9)])
+        self.assertEqual(len(model.decmem), 9)
+
+    def test_bounded_decmem_stays_bounded(self):
+        model = actr.ACTRModel()
+        model.decmem.add([fact(index) for index in range(9)])
+        with tempfile.TemporaryDirectory() as directory:
+            install_bounded_decmem(model, capacity=10, policy=EvictionPolicy.AGE, evict_to=8, archive=os.path.join(directory, 'archive'))
+            snapshot = ModelSnapshot(model)
+            forks = [snapshot.fork(), snapshot.fork()]
+            for fork in forks:
+                self.assertIsInstance(fork.decmem, BoundedDecMem)
+                self.assertEqual((fork.decmem.capacity, fork.decmem.policy, fork.decmem.evict_to), (10, EvictionPolicy.AGE, 8))
+            forks[0].decmem.add([fact(index) for index in range(10, 50)])
+            self.assertLessEqual(len(forks[0].decmem), 10)
+            self.assertGreater(get_eviction_stats(forks[0])['decmem'].evicted, 0)
+            # every fork has its own archive and the original is untouched
+            self.assertEqual(len(forks[1].decmem.archive), 0)
+            self.assertEqual(len(model.decmem), 9)
+            self.assertTrue(forks[0].decmem.restore(fact(0)))
+            self.assertNotEqual(forks[0].decmem.archive.path, forks[1].decmem.archive.path)
+            for decmem in (model.decmem, *(fork.decmem for fork in forks), snapshot.decmems['decmem'].template):
+                decmem.archive.close()
+
+
+if __name__ == '__main__':
+    unittest.main()